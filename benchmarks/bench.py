@@ -0,0 +1,244 @@
+"""
+Offline benchmarks of the CDO client against the local mock CDO API (benchmarks/mock_server.py).
+
+    python -m benchmarks.bench                                  # run every benchmark, print a table
+    python -m benchmarks.bench --output baseline.json           # ...and save the results
+    python -m benchmarks.bench --compare baseline.json          # fail (exit 1) on a regression against a saved run
+
+Each benchmark runs once to warm up, `--repeat` times for timing and once more under tracemalloc for the peak memory.
+The mock fleet and its injected latency and errors are seeded, so runs on the same machine are comparable.
+"""
+from cdo_client import ChangelogAggregator, CDOClient, CDOFleetExecutor, RequestMetrics
+from cdo_client.decoders import JSON_BACKEND
+from .mock_server import MOCK_NOW, MockCDOServer, MockConfig
+from datetime import timedelta
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# For each metric, whether a higher value is better
+METRICS = {"records_per_second": True, "requests_per_second": True, "p50": False, "p99": False, "peak_mb": False}
+
+
+def make_client(server, rate_limited=False):
+    client = CDOClient("benchmark-token", "us")
+    client.base_url = client.mssp_url = server.url
+    if not rate_limited:
+        client.rate_limiter = None
+    client.retry_policy.backoff_factor = 0.01
+    return client
+
+
+def bench_changelogs(client, args):
+    return len(client.get_all_changelogs(limit=200, max_workers=args.workers))
+
+
+def bench_mssp_devices(client, args):
+    return len(client.get_mssp_devices())
+
+
+def bench_mssp_devices_paged(client, args):
+    return sum(1 for _ in client.iter_mssp_devices(limit=200, max_workers=args.workers))
+
+
+def bench_tenant_search(client, args):
+    matches = 0
+    for term in ("tenant-0001", "0002", "TENANT-00", "missing"):
+        matches += len(client.search_tenants(term))
+    return matches
+
+
+def bench_fleet_fanout(client, args):
+    server_url = client.base_url
+    rate_limiter = client.rate_limiter
+
+    class BenchClient(CDOClient):
+        def __init__(self, *init_args, **kwargs):
+            super().__init__(*init_args, **kwargs)
+            self.base_url = self.mssp_url = server_url
+            self.rate_limiter = rate_limiter
+            self.retry_policy.backoff_factor = client.retry_policy.backoff_factor
+
+    tenants = {f"tenant-{index}": (f"token-{index}", "us") for index in range(args.tenants)}
+    executor = CDOFleetExecutor(tenants, max_workers=args.workers, client_class=BenchClient)
+    executor.metrics = client.metrics
+    results = executor.run_all("get_tenant_context")
+    return sum(1 for result in results.values() if not isinstance(result, Exception))
+
+
+def bench_changelog_aggregate(client, args):
+    # Every tenant sees the same mock changelogs, 4 tenants make 4x the records
+    clients = {f"tenant-{index}": client.with_token(f"token-{index}") for index in range(4)}
+    aggregator = ChangelogAggregator(clients, window=timedelta(hours=6), max_workers=args.workers)
+    records = 0
+    for _ in aggregator.iter_changelogs(MOCK_NOW - args.changelogs * 60_000, MOCK_NOW + 1):
+        records += 1
+    return records
+
+
+BENCHMARKS = {
+    "changelogs": bench_changelogs,
+    "mssp_devices": bench_mssp_devices,
+    "mssp_devices_paged": bench_mssp_devices_paged,
+    "tenant_search": bench_tenant_search,
+    "fleet_fanout": bench_fleet_fanout,
+    "changelog_aggregate": bench_changelog_aggregate,
+}
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def run_benchmark(fn, server, args):
+    def run_once():
+        client = make_client(server, rate_limited=args.rate_limited)
+        latencies = []
+        client.metrics = RequestMetrics(hooks=[lambda sample: latencies.append(sample.duration)])
+        requests_before = server.requests
+        start = time.perf_counter()
+        records = fn(client, args)
+        elapsed = time.perf_counter() - start
+        return elapsed, records, server.requests - requests_before, latencies
+
+    run_once()  # Warm up: connections, imports, caches
+    timings = []
+    latencies = []
+    records = requests = 0
+    for _ in range(args.repeat):
+        gc.collect()
+        elapsed, records, requests, run_latencies = run_once()
+        timings.append(elapsed)
+        latencies.extend(run_latencies)
+    gc.collect()
+    tracemalloc.start()
+    run_once()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    median = statistics.median(timings)
+    return {
+        "records": records,
+        "requests": requests,
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "stdev_seconds": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "records_per_second": records / median if median else None,
+        "requests_per_second": requests / median if median else None,
+        "p50": _percentile(latencies, 0.5),
+        "p99": _percentile(latencies, 0.99),
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json": JSON_BACKEND,
+        "commit": commit,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: list of regressions, metrics that are more than `threshold` (a fraction) worse than in the baseline
+    :rtype: list
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher_is_better in METRICS.items():
+            old = baseline.get(name, {}).get(metric)
+            new = metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def print_table(results):
+    print(
+        f"{'benchmark':<20}{'records':>9}{'requests':>10}{'median s':>10}{'rec/s':>12}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'peak MB':>9}"
+    )
+    for name, metrics in results.items():
+        p50 = metrics["p50"] * 1000 if metrics["p50"] is not None else float("nan")
+        p99 = metrics["p99"] * 1000 if metrics["p99"] is not None else float("nan")
+        print(
+            f"{name:<20}{metrics['records']:>9}{metrics['requests']:>10}{metrics['median_seconds']:>10.3f}"
+            f"{metrics['records_per_second'] or 0:>12.0f}{p50:>9.2f}{p99:>9.2f}{metrics['peak_mb']:>9.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CDO client against a local mock CDO API")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run, of {', '.join(BENCHMARKS)} (default all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="max_workers of the paged and fan-out benchmarks")
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--changelogs", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds of latency added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int, default=200)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limited", action="store_true", help="keep the client's region rate limiter")
+    parser.add_argument("--verbose", action="store_true", help="show the client's retry warnings")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file written by --output to compare the results against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="the regression tolerance, 0.1 is 10%%")
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.ERROR)
+    config = MockConfig(
+        tenants=args.tenants,
+        devices=args.devices,
+        changelogs=args.changelogs,
+        latency=args.latency,
+        jitter=args.jitter,
+        max_page_size=args.max_page_size,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    results = {}
+    with MockCDOServer(config) as server:
+        for name in args.benchmarks or BENCHMARKS:
+            results[name] = run_benchmark(BENCHMARKS[name], server, args)
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"environment": environment(), "config": vars(args), "results": results}, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Cold start budget of the CDO client: the time a fresh interpreter spends importing the package and building a client.
+
+    python -m benchmarks.import_time                    # measure, fail (exit 1) if a scenario is over its budget
+    python -m benchmarks.import_time --scale 2          # double every budget, e.g. on a slow CI machine
+
+Every scenario runs in its own interpreter `--repeat` times and the fastest run is compared against the budget, so a
+busy machine does not fail the check. Besides the time, each scenario lists modules it must not import: those checks
+do not depend on the machine at all and catch an eager import creeping back into the package.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# name: (code to time, budget in milliseconds, modules that must not be imported)
+SCENARIOS = {
+    "import_package": (
+        "import cdo_client",
+        15.0,
+        ("requests", "urllib3", "cdo_client.base", "sqlite3", "pandas", "aiohttp"),
+    ),
+    "import_devices": (
+        "from cdo_client import CDODevices",
+        200.0,
+        ("cdo_client.mssp", "cdo_client.changelog_store", "cdo_client.snapshots", "sqlite3", "pandas", "aiohttp"),
+    ),
+    "import_client": ("from cdo_client import CDOClient", 200.0, ("sqlite3", "pandas", "aiohttp")),
+    "create_client": (
+        "from cdo_client import CDOClient; CDOClient('token', 'us')",
+        200.0,
+        ("sqlite3", "pandas", "aiohttp"),
+    ),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(code):
+    """
+    :param code: the statements to time
+    :return: the milliseconds they took in a fresh interpreter and the modules imported by then
+    :rtype: tuple
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code)], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output)
+    return result["ms"], set(result["modules"])
+
+
+def run_scenario(code, budget, forbidden, repeat):
+    timings = []
+    modules = set()
+    for _ in range(repeat):
+        elapsed, modules = measure(code)
+        timings.append(elapsed)
+    return {
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "budget_ms": budget,
+        "forbidden_imports": sorted(module for module in forbidden if module in modules),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import time of the CDO client against its budget")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run, of {', '.join(SCENARIOS)} (default all)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this factor")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    results = {}
+    failures = []
+    print(f"{'scenario':<20}{'min ms':>10}{'max ms':>10}{'budget ms':>11}")
+    for name in args.scenarios or SCENARIOS:
+        code, budget, forbidden = SCENARIOS[name]
+        result = results[name] = run_scenario(code, budget * args.scale, forbidden, args.repeat)
+        print(f"{name:<20}{result['min_ms']:>10.1f}{result['max_ms']:>10.1f}{result['budget_ms']:>11.1f}")
+        if result["min_ms"] > result["budget_ms"]:
+            failures.append(f"{name}: {result['min_ms']:.1f}ms is over the {result['budget_ms']:.1f}ms budget")
+        if result["forbidden_imports"]:
+            failures.append(f"{name}: imported {', '.join(result['forbidden_imports'])}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
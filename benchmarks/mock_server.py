@@ -0,0 +1,414 @@
+"""
+Local stand-in for the CDO API, for benchmarking the client offline. The fleet (tenants, users, devices and changelogs)
+is generated from a seed, so every run serves exactly the same data, and latency and 429/5xx injection are seeded too.
+
+    python -m benchmarks.mock_server --port 8080 --devices 20000 --latency 0.02
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+DEVICE_TYPES = ("ASA", "FTD", "FIREPOWER", "AWS_VPC", "MERAKI_SECURITY_APPLIANCE")
+CONNECTIVITY_STATES = (1, 1, 1, 1, 0, -2, -5, 2)
+REGIONS = ("us", "eu", "apj")
+MOCK_NOW = 1_600_000_000_000  # The timestamp of the newest changelog, each older one is a minute earlier
+
+
+class MockConfig(object):
+    """ Knobs of the mock CDO API """
+
+    def __init__(
+        self,
+        tenants=50,
+        devices=5000,
+        changelogs=5000,
+        users=100,
+        events_per_changelog=3,
+        latency=0.0,
+        jitter=0.0,
+        max_page_size=200,
+        throttle_rate=0.0,
+        error_rate=0.0,
+        retry_after=0,
+        seed=0,
+    ):
+        """
+        :param tenants: the number of tenants in the MSSP portal (and the tenant list)
+        :param devices: the number of devices in the fleet
+        :param changelogs: the number of changelogs in the tenant
+        :param users: the number of users in the tenant
+        :param events_per_changelog: the number of events nested in each changelog
+        :param latency: seconds added to every response
+        :param jitter: up to this many seconds of seeded random latency added on top
+        :param max_page_size: the largest page returned, whatever limit is asked for
+        :param throttle_rate: the fraction of requests answered with 429 Too Many Requests
+        :param error_rate: the fraction of requests answered with 503 Service Unavailable
+        :param retry_after: the Retry-After header (seconds) sent with a 429
+        :param seed: seed of the generated fleet and of the injected latency and errors
+        """
+        self.tenants = tenants
+        self.devices = devices
+        self.changelogs = changelogs
+        self.users = users
+        self.events_per_changelog = events_per_changelog
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+class MockFleet(object):
+    """ The generated data served by the mock API """
+
+    def __init__(self, config):
+        rng = random.Random(config.seed)
+
+        def uid():
+            return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+        self.tenants = [
+            {
+                "uid": uid(),
+                "name": f"tenant-{index:05d}",
+                "organizationName": f"Customer {index:05d}",
+                "cdoRegion": rng.choice(REGIONS),
+                "services": ["DEVICES", "POLICIES"],
+            }
+            for index in range(config.tenants)
+        ]
+        self.devices = [
+            {
+                "uid": uid(),
+                "name": f"fw-{index:06d}",
+                "deviceType": rng.choice(DEVICE_TYPES),
+                "serial": f"JAD{rng.getrandbits(32):010d}",
+                "ipv4": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+                "connectivityState": rng.choice(CONNECTIVITY_STATES),
+                "configState": rng.choice(("SYNCED", "SYNCED", "NOT_SYNCED", "CONFLICT_DETECTED")),
+                "softwareVersion": rng.choice(("9.14(2)", "9.16(1)", "7.0.1", "6.7.0")),
+                "modelNumber": rng.choice(("ASA5516", "FPR1120", "FPR2130", "ASAv30")),
+                "organizationName": rng.choice(self.tenants)["organizationName"] if self.tenants else "",
+                "cdoRegion": rng.choice(REGIONS),
+            }
+            for index in range(config.devices)
+        ]
+        now = MOCK_NOW
+        self.changelogs = []
+        for index in range(config.changelogs):
+            timestamp = now - index * 60_000
+            self.changelogs.append(
+                {
+                    "uid": uid(),
+                    "name": f"changelog-{index:06d}",
+                    "lastEventTimestamp": timestamp,
+                    "changeLogState": rng.choice(("ACTIVE", "COMPLETED")),
+                    "objectReference": {"uid": uid(), "namespace": "targets", "type": "devices"},
+                    "lastEventDescription": "Deployed changes",
+                    "lastEventUser": f"user{rng.randrange(20)}@example.com",
+                    "events": [
+                        {
+                            "date": timestamp - event * 1000,
+                            "user": f"user{rng.randrange(20)}@example.com",
+                            "action": rng.choice(("UPDATE", "DEPLOY", "READ")),
+                            "description": "Changed access rule",
+                            "changeDetails": {"field": "rule", "old": rng.random(), "new": rng.random()},
+                        }
+                        for event in range(config.events_per_changelog)
+                    ],
+                }
+            )
+        self.users = {
+            f"user{index}@example.com": {
+                "uid": uid(),
+                "name": f"user{index}@example.com",
+                "roles": ["ROLE_READ_ONLY"],
+                "apiOnlyUser": False,
+                "lastSuccessfulLogin": now,
+            }
+            for index in range(config.users)
+        }
+        self.mssp_tenants = {tenant["name"].lower(): tenant for tenant in self.tenants}
+        self.lock = threading.Lock()
+        self.uid = uid
+
+
+def _search(records, query, fields):
+    """ Crude emulation of the `q` search parameter: keep the records that mention any quoted or starred term """
+    if not query:
+        return records
+    terms = [term.strip('*"()') for term in query.replace(" OR ", " ").split() if ":" in term]
+    terms = [term.split(":", 1)[1].strip('*"()').lower() for term in terms]
+    terms = [term for term in terms if term]
+    if not terms:
+        return records
+    return [
+        record
+        for record in records
+        if any(term in str(record.get(field, "")).lower() for field in fields for term in terms)
+    ]
+
+
+def _time_range(records, query, field="lastEventTimestamp"):
+    """ Emulation of a `field:[start TO end]` range in the `q` parameter, either bound may be * """
+    match = re.search(rf"{field}:\[(\S+) TO (\S+)\]", query or "")
+    if not match:
+        return records
+    lower, upper = (None if bound == "*" else int(bound) for bound in match.groups())
+    return [
+        record
+        for record in records
+        if (lower is None or record[field] >= lower) and (upper is None or record[field] <= upper)
+    ]
+
+
+class MockCDOHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are written separately, don't let Nagle hold the body back
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    @property
+    def fleet(self):
+        return self.server.fleet
+
+    def _send(self, status, document=None, headers=None):
+        body = b"" if document is None else json.dumps(document).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _inject(self):
+        """ Add the configured latency and answer with a 429 or 503 if this request was picked for one """
+        with self.server.rng_lock:
+            jitter = self.server.rng.random() * self.config.jitter
+            roll = self.server.rng.random()
+        if self.config.latency or jitter:
+            time.sleep(self.config.latency + jitter)
+        self.server.count_request()
+        fault = self.server.take_fault(self.path)
+        if fault is not None:
+            status, retry_after = fault
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+            self._send(status, {"message": "Injected failure"}, headers=headers)
+            return True
+        if roll < self.config.throttle_rate:
+            self._send(429, {"message": "Too Many Requests"}, headers={"Retry-After": str(self.config.retry_after)})
+            return True
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self._send(503, {"message": "Service Unavailable"})
+            return True
+        return False
+
+    def _page(self, records, query):
+        """ Without a limit the whole collection is returned, like the unpaged calls of the real API """
+        if "limit" not in query:
+            return records
+        limit = min(int(query["limit"][0]), self.config.max_page_size)
+        offset = int(query.get("offset", ["0"])[0])
+        return records[offset:offset + limit]
+
+    def do_GET(self):
+        self._read_body()
+        if self._inject():
+            return
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip("/")
+        query = parse_qs(parts.query)
+        if path == "/aegis/rest/changelogs/query":
+            records = _time_range(self.fleet.changelogs, query.get("q", [""])[0])
+            if query.get("sort", [""])[0].endswith(":asc"):
+                records = records[::-1]
+            return self._send(200, self._page(records, query))
+        if path in ("/api/theia/v1/devices", "/aegis/rest/v1/services/targets/devices"):
+            records = _search(self.fleet.devices, query.get("q", [""])[0], ("name", "ipv4", "serial", "deviceType"))
+            return self._send(200, self._page(records, query))
+        if path.startswith("/aegis/rest/v1/services/targets/devices/"):
+            uid = path.rsplit("/", 1)[1]
+            device = next((device for device in self.fleet.devices if device["uid"] == uid), None)
+            return self._send(200, device) if device else self._send(404, {"message": "Not Found"})
+        if path == "/api/theia/v1/tenants":
+            return self._send(200, self._page(list(self.fleet.mssp_tenants.values()), query))
+        if path == "/anubis/rest/v1/user/tenants":
+            return self._send(200, self.fleet.tenants)
+        if path == "/anubis/rest/v1/users":
+            return self._send(200, list(self.fleet.users.values()))
+        if path == "/aegis/rest/v1/services/common/tenantcontext":
+            tenant_uid = self.fleet.tenants[0]["uid"] if self.fleet.tenants else ""
+            return self._send(200, [{"uid": tenant_uid, "name": "mock"}])
+        return self._send(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        body = self._read_body()
+        if self._inject():
+            return
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/api/theia/v1/tenants":
+            token = json.loads(body or b"{}").get("apiToken", "")
+            name = f"tenant-{token}".lower()
+            with self.fleet.lock:
+                if name in self.fleet.mssp_tenants:
+                    return self._send(400, {"message": "Duplicate Tenant"})
+                tenant = {"uid": self.fleet.uid(), "name": name, "organizationName": name, "cdoRegion": "us"}
+                self.fleet.mssp_tenants[name] = tenant
+            return self._send(200, tenant)
+        if path.startswith("/anubis/rest/v1/users/"):
+            username = unquote(path.rsplit("/", 1)[1])
+            form = parse_qs(body.decode())
+            with self.fleet.lock:
+                user = self.fleet.users.setdefault(username, {"uid": self.fleet.uid(), "name": username})
+                user["roles"] = form.get("roles", ["ROLE_READ_ONLY"])
+                user["apiOnlyUser"] = form.get("isApiOnlyUser", ["false"])[0] == "true"
+            return self._send(200, user)
+        if path.startswith("/anubis/rest/v1/oauth/token/"):
+            return self._send(200, {"access_token": uuid.uuid4().hex})
+        return self._send(404, {"message": "Not Found"})
+
+    def do_DELETE(self):
+        self._read_body()
+        if self._inject():
+            return
+        path = urlsplit(self.path).path.rstrip("/")
+        if path.startswith("/anubis/rest/v1/users/"):
+            uid = path.rsplit("/", 1)[1]
+            with self.fleet.lock:
+                for name, user in list(self.fleet.users.items()):
+                    if user["uid"] == uid:
+                        del self.fleet.users[name]
+                        return self._send(204)
+            return self._send(404, {"message": "Not Found"})
+        if path.startswith("/api/theia/v1/tenants/"):
+            with self.fleet.lock:
+                self.fleet.mssp_tenants.pop(unquote(path.rsplit("/", 1)[1]).lower(), None)
+            return self._send(204)
+        return self._send(404, {"message": "Not Found"})
+
+
+class MockCDOServer(ThreadingHTTPServer):
+    """
+    The mock CDO API on a background thread. Point a client at it with
+    client.base_url = client.mssp_url = server.url
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.fleet = MockFleet(self.config)
+        self.rng = random.Random(self.config.seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._faults = []
+        self._thread = None
+        super().__init__((host, port), MockCDOHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._requests_lock:
+            self.requests += 1
+
+    def fail_next(self, status, count=1, path=None, retry_after=None):
+        """
+        Answer the next `count` requests with `status`, for tests that need a failure at an exact point rather than at
+        the random ones of throttle_rate and error_rate
+        :param status: the HTTP status to answer with, e.g. 429 or 503
+        :param count: the number of requests to fail
+        :param path: only fail requests whose path and query contain this string, e.g. "offset=200"
+        :param retry_after: the Retry-After header (seconds) to send with the failures
+        """
+        with self._requests_lock:
+            self._faults.append([status, count, path, retry_after])
+
+    def take_fault(self, path):
+        """
+        :param path: the path and query of the request
+        :return: the (status, retry_after) the request must fail with, None if it should be served
+        :rtype: tuple or None
+        """
+        with self._requests_lock:
+            for fault in self._faults:
+                status, count, match, retry_after = fault
+                if match is None or match in path:
+                    fault[1] -= 1
+                    if fault[1] <= 0:
+                        self._faults.remove(fault)
+                    return status, retry_after
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock CDO API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--changelogs", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int, default=200)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = MockConfig(
+        tenants=args.tenants,
+        devices=args.devices,
+        changelogs=args.changelogs,
+        latency=args.latency,
+        jitter=args.jitter,
+        max_page_size=args.max_page_size,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = MockCDOServer(config, host=args.host, port=args.port)
+    print(f"Mock CDO API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,50 @@
+import importlib
 import logging
-from .tenants import CDOTenants
-from .base import CDOBaseClient
-from .devices import CDODevices
-from .changelogs import CDOChangeLogs
-from .state_machine import CDOStateMachines
-from .mssp import CDOMSSPClient
 
 log = logging.getLogger(__name__)
 
+# The public names of the package and the submodule each one lives in. Submodules are only imported when one of their
+# names is first used, so e.g. `from cdo_client import CDODevices` does not pay for the MSSP, changelog store or
+# snapshot modules, and `import cdo_client` on its own imports nothing but this table.
+_LAZY_ATTRIBUTES = {
+    "CDOClient": "client",
+    "CDOTenants": "tenants",
+    "CDOBaseClient": "base",
+    "CDODevices": "devices",
+    "CDOChangeLogs": "changelogs",
+    "CDOStateMachines": "state_machine",
+    "CDOMSSPClient": "mssp",
+    "CDOFleetExecutor": "fleet",
+    "CDOTransport": "transport",
+    "ResponseCache": "cache",
+    "RequestMetrics": "metrics",
+    "Query": "query",
+    "ChangelogStore": "changelog_store",
+    "ChangelogAggregator": "aggregate",
+    "JsonLinesSink": "aggregate",
+    "SnapshotStore": "snapshots",
+    "FleetInventory": "inventory",
+    "JobWatcher": "watcher",
+    "WatchScheduler": "watcher",
+    "LazyDevice": "transforms",
+    "ChangeLog": "models",
+    "ChangeLogEvent": "models",
+    "Device": "models",
+    "MSSPTenant": "models",
+    "Tenant": "models",
+}
 
-class CDOClient(CDOTenants, CDODevices, CDOChangeLogs, CDOStateMachines, CDOMSSPClient):
-    """
-    This package brings provides API access to Cisco Defense Orchestrator (CDO)
-    """
+__all__ = list(_LAZY_ATTRIBUTES)
 
-    def __init__(self, api_token, region, api_version="1", verify=""):
-        CDOBaseClient.__init__(self, api_token, region, api_version=api_version, verify=verify)
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Later lookups no longer go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
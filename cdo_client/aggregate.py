@@ -0,0 +1,243 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from .bulk import BulkReport
+from .changelogs import changelog_params
+from .fleet import CDOFleetExecutor
+from .query import Query, to_epoch_ms
+import heapq
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FIELD = "lastEventTimestamp"
+
+
+def time_windows(start, end, window):
+    """
+    :param start: datetime or epoch milliseconds, inclusive
+    :param end: datetime or epoch milliseconds, exclusive
+    :param window: the length of a window, a timedelta or milliseconds
+    :return: list of (start, end) epoch millisecond windows that cover [start, end), oldest first. Windows are half
+        open, so a changelog on a boundary belongs to exactly one of them.
+    :rtype: list
+    """
+    start, end = to_epoch_ms(start), to_epoch_ms(end)
+    step = int(window.total_seconds() * 1000) if isinstance(window, timedelta) else int(window)
+    if step <= 0:
+        raise ValueError("window must be positive")
+    return [(lower, min(lower + step, end)) for lower in range(start, end, step)]
+
+
+def _timestamp(changelog):
+    return changelog.get(TIMESTAMP_FIELD) or 0
+
+
+def _tagged(tenant, changelogs):
+    for changelog in changelogs:
+        yield tenant, changelog
+
+
+class ChangelogShard(object):
+    """ The changelogs of one tenant within one time window [start, end) """
+
+    __slots__ = ("tenant", "start", "end")
+
+    def __init__(self, tenant, start, end):
+        self.tenant = tenant
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"ChangelogShard({self.tenant!r}, {self.start}, {self.end})"
+
+
+class ChangelogAggregator(object):
+    """
+    Collects the changelogs of a whole fleet for a date range. Each tenant's history is cut into time windows on
+    lastEventTimestamp, so no shard has to page to a deep offset and a huge tenant is fetched as many small shards in
+    parallel instead of one long walk. The shards of every tenant are fetched concurrently, window after window, and
+    each window is k-way merged by timestamp as its pages arrive. Every shard is streamed in the order the API sorted
+    it, with its next page requested while the current one is merged, so at most two pages per shard are ever held
+    in memory:
+
+        aggregator = ChangelogAggregator(fleet, window=timedelta(hours=6))
+        with JsonLinesSink("changelogs.jsonl") as sink:
+            report = aggregator.aggregate(sink, datetime(2024, 1, 1), datetime(2024, 4, 1))
+    """
+
+    def __init__(self, clients, window=timedelta(days=1), max_workers=8, limit=200, prefetch=2, query=None):
+        """
+        :param clients: a CDOFleetExecutor, or a mapping of tenant name to client
+        :param window: the length of a shard, a timedelta or milliseconds
+        :param max_workers: the number of pages fetched concurrently in each region. With a CDOFleetExecutor it never
+            exceeds the executor's limit for the region (its region_limits, or its max_workers).
+        :param limit: the number of records to request per page (API MAX = 200)
+        :param prefetch: the number of windows whose first pages are fetched ahead of the one being merged
+        :param query: a Query of further filters and the fields to return, see cdo_client.query. lastEventTimestamp
+            is always returned, the merge is ordered on it.
+        """
+        if isinstance(clients, CDOFleetExecutor):
+            self.tenants = list(clients.tenants)
+            self._get_client = clients.get_client
+            self._regions = {tenant: region for tenant, (_, region) in clients.tenants.items()}
+            self._region_limits = {
+                region: min(max_workers, clients.region_limits.get(region, clients.max_workers))
+                for region in set(self._regions.values())
+            }
+        else:
+            self.tenants = list(clients)
+            self._get_client = clients.__getitem__
+            self._regions = {}
+            self._region_limits = {}
+        self.window = window
+        self.max_workers = max_workers
+        self.limit = limit
+        self.prefetch = prefetch
+        self.query = query.copy() if query is not None else Query()
+        if self.query.fields:
+            self.query.select(TIMESTAMP_FIELD)
+
+    def shards(self, start, end):
+        """
+        :return: the shards of the date range, window by window
+        :rtype: list
+        """
+        return [
+            ChangelogShard(tenant, lower, upper)
+            for lower, upper in time_windows(start, end, self.window)
+            for tenant in self.tenants
+        ]
+
+    def fetch_page(self, shard, offset):
+        """
+        :param shard: the shard to fetch a page of
+        :param offset: the offset of the page
+        :return: the page of changelogs, oldest first
+        :rtype: list
+        :raises: HTTPError if the page cannot be read, so that a missing page is never taken for the end of the shard
+        """
+        client = self._get_client(shard.tenant)
+        query = self.query.copy().between(TIMESTAMP_FIELD, shard.start, shard.end - 1)
+        params = changelog_params(f"{TIMESTAMP_FIELD}:asc", query)
+        page = client.get_operation(
+            client.PREFIX_LIST["CHANGELOG_QUERY"],
+            params={**params, "limit": f"{self.limit}", "offset": f"{offset}"},
+            use_cache=False,
+            raise_errors=True,
+        )
+        return page or []
+
+    def _stream_shard(self, shard, future, submit, report):
+        """
+        Generator that yields the shard's changelogs page by page, requesting the next page before the current one is
+        merged. A shard that fails is recorded as failed and ends there.
+        :param future: the future of the shard's first page, replaced by that of the next page as the stream advances
+            so that no page is kept once it has been merged
+        """
+        count = 0
+        offset = 0
+        while future is not None:
+            try:
+                page = future.result()
+            except Exception as ex:
+                report.fail(shard, ex)
+                return
+            offset += self.limit
+            future = submit(shard, offset) if len(page) >= self.limit else None
+            count += len(page)
+            yield from _tagged(shard.tenant, page)
+            del page
+        report.succeed(shard, count)
+
+    def iter_changelogs(self, start, end, report=None):
+        """
+        Generator that yields the fleet's changelogs in [start, end), oldest first
+        :param start: datetime or epoch milliseconds, inclusive
+        :param end: datetime or epoch milliseconds, exclusive
+        :param report: a BulkReport that records the outcome of every shard. A shard that fails is recorded as failed
+            and ends at the failed page, so it can be fetched again later. The changelogs of its earlier pages have
+            already been streamed by then.
+        :return: generator of (tenant, changelog) tuples
+        :rtype: generator
+        """
+        report = report if report is not None else BulkReport()
+        windows = iter(time_windows(start, end, self.window))
+        pending = deque()
+        executors = {}
+
+        def submit(shard, offset):
+            region = self._regions.get(shard.tenant)
+            if region not in executors:
+                executors[region] = ThreadPoolExecutor(
+                    max_workers=self._region_limits.get(region, self.max_workers),
+                    thread_name_prefix=f"cdo-changelogs-{region}",
+                )
+            return executors[region].submit(self.fetch_page, shard, offset)
+
+        def submit_window(window):
+            shards = [ChangelogShard(tenant, *window) for tenant in self.tenants]
+            return [(shard, submit(shard, 0)) for shard in shards]
+
+        try:
+            for window in windows:
+                pending.append(submit_window(window))
+                if len(pending) > self.prefetch:
+                    break
+            while pending:
+                first_pages = pending.popleft()
+                window = next(windows, None)
+                if window is not None:
+                    pending.append(submit_window(window))
+                sources = [self._stream_shard(shard, future, submit, report) for shard, future in first_pages]
+                del first_pages
+                yield from heapq.merge(*sources, key=lambda item: _timestamp(item[1]))
+        finally:
+            for executor in executors.values():  # The caller may have stopped early, drop the pages nobody will read
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def aggregate(self, sink, start, end):
+        """
+        Stream the fleet's changelogs in [start, end) into a sink, oldest first
+        :param sink: callable called with (tenant, changelog) for every changelog, e.g. a JsonLinesSink
+        :param start: datetime or epoch milliseconds, inclusive
+        :param end: datetime or epoch milliseconds, exclusive
+        :return: the report of the shards, each succeeded shard paired with its number of changelogs and each failed one
+            with its error
+        :rtype: BulkReport
+        """
+        report = BulkReport()
+        written = 0
+        for tenant, changelog in self.iter_changelogs(start, end, report=report):
+            sink(tenant, changelog)
+            written += 1
+        logger.info(f"Aggregated {written} changelogs from {len(self.tenants)} tenants: {report.summary}")
+        return report
+
+
+class JsonLinesSink(object):
+    """ Writes each changelog as one JSON line, with the tenant it came from under `tenant` """
+
+    def __init__(self, path_or_file):
+        """
+        :param path_or_file: the path of the file to write, or a file object open for writing text
+        """
+        self._owns_file = isinstance(path_or_file, str)
+        self.file = open(path_or_file, "w") if self._owns_file else path_or_file
+        self.count = 0
+
+    def __call__(self, tenant, changelog):
+        self.file.write(json.dumps({"tenant": tenant, **changelog}, separators=(",", ":")))
+        self.file.write("\n")
+        self.count += 1
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,33 @@
+import importlib
+import logging
+
+log = logging.getLogger(__name__)
+
+# Loaded on first use like the names of cdo_client itself, see cdo_client._LAZY_ATTRIBUTES
+_LAZY_ATTRIBUTES = {
+    "AsyncCDOClient": "client",
+    "AsyncCDOBaseClient": "base",
+    "AsyncCDOTransport": "base",
+    "AsyncCDOTenants": "tenants",
+    "AsyncCDODevices": "devices",
+    "AsyncCDOChangeLogs": "changelogs",
+    "AsyncCDOStateMachines": "state_machine",
+    "AsyncJobWatcher": "watcher",
+    "watch_all": "watcher",
+    "AsyncCDOMSSPClient": "mssp",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
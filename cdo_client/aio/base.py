@@ -0,0 +1,371 @@
+from functools import wraps
+from requests import HTTPError
+from ..base import CDOAPIWrapper, CDOBaseClient
+from ..decoders import decode_json
+from ..helpers import PREFIX_LIST, CDO_REGION, DEVICE_TYPES
+from ..metrics import RequestSample, endpoint_template, request_attempt
+from ..ratelimit import RateLimiter, get_region_limiter
+from ..cache import ResponseCache
+from ..retry import RetryPolicy
+from ..singleflight import shared_outcome
+from .singleflight import AsyncSingleFlight
+import aiohttp
+import asyncio
+import copy
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDOAPIWrapper(CDOAPIWrapper):
+    """The asyncio flavour of CDOAPIWrapper, errors are handled in exactly the same way as the blocking client"""
+
+    def __call__(self, fn):
+        @wraps(fn)
+        async def new_func(*args, raise_errors=False, retry_unsafe=False, **kwargs):
+            client = args[0] if args else None
+            idempotent = self.idempotent or retry_unsafe
+            attempt = 0
+            while True:
+                attempt_token = request_attempt.set(attempt)
+                shared_token = shared_outcome.set(False)
+                try:
+                    result = await fn(*args, **kwargs)
+                    if not shared_outcome.get():
+                        self.on_success(client)
+                    return result
+                except HTTPError as ex:
+                    delay = None
+                    if idempotent or self.is_unsent(ex):
+                        delay = self.get_retry_delay(client, fn, ex, attempt, shared=shared_outcome.get())
+                    if delay is None:
+                        if raise_errors:
+                            raise
+                        self.handle_http_error(fn, ex)
+                        return
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as ex:
+                    if not idempotent and not self.is_unsent(ex):
+                        raise
+                    delay = self.get_retry_delay(client, fn, ex, attempt, shared=shared_outcome.get())
+                    if delay is None:
+                        raise
+                finally:
+                    request_attempt.reset(attempt_token)
+                    shared_outcome.reset(shared_token)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        return new_func
+
+    @staticmethod
+    def is_unsent(ex):
+        """ See CDOAPIWrapper.is_unsent, aiohttp raises ClientConnectorError when the connection was never made """
+        if isinstance(ex, HTTPError):
+            return ex.response is not None and ex.response.status_code == 429
+        return isinstance(ex, aiohttp.ClientConnectorError)
+
+
+class AsyncResponse(object):
+    """
+    The parts of an aiohttp response that we need once the connection has been released. Mirrors the attributes of a
+    requests.Response that are used by CDOBaseClient.check_response_code and CDOAPIWrapper
+    """
+
+    def __init__(self, status_code, headers, content, url=""):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncCDOTransport(object):
+    """
+    Pooled aiohttp transport. A single transport can be shared by any number of AsyncCDOClient instances (e.g. one per
+    tenant) so that all of them draw from the same pool of keep-alive connections on one event loop.
+    """
+
+    def __init__(self, limit=100, limit_per_host=0, timeout=300):
+        """
+        :param limit: the total number of simultaneous connections
+        :param limit_per_host: the number of simultaneous connections to a single host (0 for no limit)
+        :param timeout: total timeout in seconds of a single request
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self):
+        """ The aiohttp session is created on first use so it binds to the running event loop """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def request(self, method, url, **kwargs):
+        """
+        Perform the request and read the whole body so the connection goes straight back to the pool
+        :return: the response
+        :rtype: AsyncResponse
+        """
+        async with self.session.request(method, url, **kwargs) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, response.headers, content, url=str(response.url))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncCDOBaseClient(object):
+    """
+    This class is inherited by all asyncio CDO classes. It mirrors CDOBaseClient, but every operation is a coroutine
+    and all I/O goes through a pooled AsyncCDOTransport
+    """
+
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        self.base_url = "https://" + CDO_REGION[region]
+        self.mssp_url = f"https://{PREFIX_LIST['MSSP_ENV']}"
+        self.region = region
+        self.transport = transport or AsyncCDOTransport()
+        self._owns_transport = transport is None
+        self.headers = {}
+        self.set_auth_header(api_token)
+        self.rate_limiter = get_region_limiter(region)
+        self.retry_policy = RetryPolicy()
+        self.single_flight = AsyncSingleFlight()
+        self.metrics = None
+        self.json_loads = decode_json
+        self.verify = verify
+        self.api_version = api_version
+        self.PREFIX_LIST = PREFIX_LIST
+        self.DEVICE_TYPES = DEVICE_TYPES
+
+    set_auth_header = CDOBaseClient.set_auth_header
+    auth_headers = CDOBaseClient.auth_headers
+
+    def with_token(self, token):
+        """
+        Return a client for another token, e.g. a tenant's, that shares this client's transport, rate limiter, retry
+        policy and metrics. See CDOBaseClient.with_token. Closing the new client never closes the shared transport.
+        :param token: the token the new client sends its requests with
+        :return: the new client
+        """
+        client = copy.copy(self)
+        client._owns_transport = False
+        client.set_auth_header(token)
+        return client
+
+    async def close(self):
+        """ Close the transport if this client created it. A shared transport must be closed by its owner """
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(self, method, endpoint, headers=None, url="", **kwargs):
+        """
+        Send the request through the transport once the rate limiter allows it and raise an HTTPError for unexpected
+        response codes
+        :return: the response
+        :rtype: AsyncResponse
+        """
+        sample = None
+        if self.metrics is not None:
+            sample = RequestSample(method, endpoint_template(endpoint), retries=request_attempt.get())
+            start = time.perf_counter()
+        if self.rate_limiter:
+            await asyncio.sleep(self.rate_limiter.reserve())
+        if sample is not None:
+            sent = time.perf_counter()
+            sample.wait = sent - start
+        try:
+            api_response = await self.transport.request(
+                method, (url or self.base_url) + endpoint, headers=headers or self.headers, **kwargs
+            )
+        except Exception as ex:
+            if sample is not None:
+                sample.server = time.perf_counter() - sent
+                sample.error = ex
+                self.metrics.record(sample)
+            raise
+        if sample is not None:
+            # aiohttp reads the whole body before the response is returned, connect and transfer are part of server
+            sample.server = time.perf_counter() - sent
+            sample.status = api_response.status_code
+            sample.bytes = len(api_response.content)
+            api_response.sample = sample
+            self.metrics.record(sample)
+        error = self.check_response_code(api_response)
+        if error:
+            raise error
+        return api_response
+
+    @AsyncCDOAPIWrapper()
+    async def get_operation(self, endpoint, params=None, headers="", url="", use_cache=True, raw=False, token=None):
+        """
+        Get the requested endpoint/resource from the API
+        :param endpoint: The path of the resource we are attempting to retrieve
+        :param params: Any query parameters that we wish to add to the path
+        :param headers: Override the class headers if one presented here
+        :param url: Override the class base URL
+        :param use_cache: share the response of an identical GET that is already in flight (see single_flight). Pass
+            False for a response that is no older than the call.
+        :param raw: return the undecoded response body, for pipelines that pass the data straight through
+        :param token: send the request with this token instead of the client's own
+        :return: dict of the requested data (bytes if raw)
+        """
+        if not use_cache or self.single_flight is None or headers:
+            headers = headers or self.auth_headers(token)
+            api_response = await self._request("GET", endpoint, params=params, headers=headers, url=url)
+        else:
+            headers = self.auth_headers(token)
+            key = ResponseCache.make_key((url or self.base_url) + endpoint, params, headers.get("Authorization", ""))
+            api_response, shared = await self.single_flight.do(
+                key, lambda: self._request("GET", endpoint, params=params, headers=headers, url=url)
+            )
+            if shared:
+                # Only share the raw body, each caller decodes its own objects
+                return api_response.content if raw else self._decode(None, api_response.content)
+        return api_response.content if raw else self._decode(api_response)
+
+    @AsyncCDOAPIWrapper(idempotent=False)
+    async def post_operation(self, endpoint, json_data=None, data=None, headers="", url="", token=None):
+        """
+        Given the project endpoint, create a new object with the given post_data
+        :param endpoint: Usually the GUID of the project where we wish to store our new object
+        :param data: Data model of the new object with values that we wish to store
+        :param json_data: If we are sending json payload (dict), give aiohttp a hint on how to serialize it
+        :param headers: Override the headers with one provided here
+        :param url: Override the url with one provided here
+        :param token: send the request with this token instead of the client's own
+        :return: the new object that was created
+        """
+        headers = headers or self.auth_headers(token)
+        api_response = await self._request("POST", endpoint, data=data, json=json_data, headers=headers, url=url)
+        return self._decode(api_response)
+
+    @AsyncCDOAPIWrapper()
+    async def put_operation(self, endpoint, put_data=None, url="", token=None):
+        """
+        Given the endpoint, modify the object with the given put_data
+        :param endpoint: the API endpoint consisting of the GUIDs of the object we wish to modify
+        :param put_data: Data model of the existing object with new values that we wish to store
+        :param url: Override the class URL if one is presented here e.g. https://dev.mysite.com
+        :param token: send the request with this token instead of the client's own
+        :return: returns the response
+        """
+        return await self._request("PUT", endpoint, data=put_data, headers=self.auth_headers(token), url=url)
+
+    @AsyncCDOAPIWrapper()
+    async def delete_operation(self, endpoint, headers=None, url=None, token=None):
+        """
+        Given the endpoint, delete the object
+        :param endpoint: the path to the object we wish to delete.
+        :param headers: Override the headers with one provided here
+        :param url: Override the url with one provided here
+        :param token: send the request with this token instead of the client's own
+        :return: None
+        """
+        await self._request("DELETE", endpoint, headers=headers or self.auth_headers(token), url=url)
+        logger.warning(f"Deleted {endpoint}")
+        return
+
+    async def iter_pages(
+        self,
+        endpoint,
+        params=None,
+        limit=100,
+        offset=0,
+        url="",
+        max_workers=1,
+        rate_limit=None,
+        token=None,
+        raise_errors=False,
+    ):
+        """
+        Async generator that walks a paginated endpoint and yields one page (list) at a time. Behaves exactly like
+        CDOBaseClient.iter_pages: up to `max_workers` pages are in flight at once and they are yielded in offset order,
+        and with raise_errors=True a page that cannot be read raises instead of ending the walk
+        :return: async generator of pages
+        """
+        limiter = RateLimiter(rate_limit)
+
+        async def get_page(page_offset):
+            await asyncio.sleep(limiter.reserve())
+            page_params = {**(params or {}), "limit": f"{limit}", "offset": f"{page_offset}"}
+            return await self.get_operation(
+                endpoint, params=page_params, url=url, token=token, raise_errors=raise_errors
+            )
+
+        while True:
+            offsets = [offset + (page * limit) for page in range(max_workers)]
+            tasks = [asyncio.ensure_future(get_page(page_offset)) for page_offset in offsets]
+            try:
+                for index, task in enumerate(tasks):
+                    page = await task
+                    tasks[index] = None
+                    if page:
+                        yield page
+                    if not page or len(page) < limit:  # This should be the last batch of records available
+                        return
+            finally:
+                for pending in tasks:
+                    if pending:
+                        pending.cancel()
+            offset = offsets[-1] + limit  # Every page in this window was full, there may be more!
+
+    async def iter_records(
+        self,
+        endpoint,
+        params=None,
+        limit=100,
+        offset=0,
+        url="",
+        max_workers=1,
+        rate_limit=None,
+        token=None,
+        raise_errors=False,
+    ):
+        """
+        Async generator that yields the individual records of a paginated endpoint. See iter_pages for the parameters.
+        :return: async generator of records
+        """
+        async for page in self.iter_pages(
+            endpoint,
+            params=params,
+            limit=limit,
+            offset=offset,
+            url=url,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            token=token,
+            raise_errors=raise_errors,
+        ):
+            for record in page:
+                yield record
+
+    check_response_code = CDOBaseClient.check_response_code
+    _decode = CDOBaseClient._decode
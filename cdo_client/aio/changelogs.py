@@ -0,0 +1,52 @@
+from .base import AsyncCDOBaseClient
+from ..changelogs import changelog_params
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDOChangeLogs(AsyncCDOBaseClient):
+    """Class for performing getting changelogs from a CDO tenant with asyncio"""
+
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    def iter_changelogs(
+        self, limit=100, offset=0, sort="lastEventTimestamp:desc", max_workers=4, rate_limit=None, query=None
+    ):
+        """
+        Async generator that yields changelog objects page by page, in the requested sort order
+        :param limit: the number of records to return at one time (API MAX = 200)
+        :param offset: user for paging records over multiple api calls
+        :param sort: Order in which to sort the returned records
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second on top of the region rate limit
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: async generator of changelog objects
+        """
+        return self.iter_records(
+            self.PREFIX_LIST["CHANGELOG_QUERY"],
+            params=changelog_params(sort, query),
+            limit=limit,
+            offset=offset,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+        )
+
+    async def get_all_changelogs(
+        self, limit=100, offset=0, sort="lastEventTimestamp:desc", max_workers=4, rate_limit=None, query=None
+    ):
+        """
+        Return a list of all objects, in the requested sort order
+        :param limit: the number of records to return at one time (API MAX = 200)
+        :param offset: user for paging records over multiple api calls
+        :param sort: Order in which to sort the returned records
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second on top of the region rate limit
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return list: return a list containing changelog objects
+        """
+        changelogs = self.iter_changelogs(
+            limit=limit, offset=offset, sort=sort, max_workers=max_workers, rate_limit=rate_limit, query=query
+        )
+        return [change_record async for change_record in changelogs]
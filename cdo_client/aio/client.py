@@ -0,0 +1,22 @@
+from .base import AsyncCDOBaseClient
+from .tenants import AsyncCDOTenants
+from .devices import AsyncCDODevices
+from .changelogs import AsyncCDOChangeLogs
+from .state_machine import AsyncCDOStateMachines
+from .mssp import AsyncCDOMSSPClient
+
+
+class AsyncCDOClient(AsyncCDOTenants, AsyncCDODevices, AsyncCDOChangeLogs, AsyncCDOStateMachines, AsyncCDOMSSPClient):
+    """
+    asyncio version of CDOClient. Every API method is a coroutine (or an async generator for the iter_* methods) and
+    all requests go through a pooled AsyncCDOTransport, which may be shared between clients for different tenants:
+
+        async with AsyncCDOTransport(limit=500) as transport:
+            clients = [AsyncCDOClient(token, region, transport=transport) for token, region in tenants]
+            results = await asyncio.gather(*[client.get_devices() for client in clients])
+    """
+
+    def __init__(self, api_token, region, api_version="1", verify="", transport=None):
+        AsyncCDOBaseClient.__init__(
+            self, api_token, region, api_version=api_version, verify=verify, transport=transport
+        )
@@ -0,0 +1,40 @@
+from .base import AsyncCDOBaseClient
+from ..devices import CDODevices
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDODevices(AsyncCDOBaseClient):
+    """Class for performing actions on devices in a CDO tenant with asyncio"""
+
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    async def get_devices(self, search="", query=None):
+        """
+        :param search: Optional return devices that have a name, IP address, or interface that matches our search string
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: list of devices with all device attributes
+        :rtype: list
+        """
+        params = CDODevices._device_search_params(search, query)
+        return await self.get_operation(self.PREFIX_LIST["DEVICES"], params=params)
+
+    def iter_devices(self, search="", limit=200, max_workers=1, rate_limit=None, query=None):
+        """
+        Async generator that yields devices page by page instead of returning the whole inventory at once
+        :param search: Optional return devices that have a name, IP address, or interface that matches our search string
+        :param limit: the number of devices to request per page
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: async generator of devices with all device attributes
+        """
+        return self.iter_records(
+            self.PREFIX_LIST["DEVICES"],
+            params=CDODevices._device_search_params(search, query),
+            limit=limit,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+        )
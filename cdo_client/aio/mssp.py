@@ -0,0 +1,95 @@
+from .base import AsyncCDOBaseClient
+from ..mssp import CDOMSSPClient
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDOMSSPClient(AsyncCDOBaseClient):
+    """
+    Class for performing CDO MSSP operations with asyncio.
+    Note that these operations require a user/token with MSSP Super Admin entitlements
+    """
+
+    def __init__(self, mssp_token, region, api_version="", verify="", transport=None):
+        super().__init__(mssp_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    async def add_mssp_tenant(self, tenant_token):
+        """
+        Given an admin token from a tenant space, add the tenant to the MSSP portal associated with this mssp token
+        :param tenant_token: The token for an admin account in the provided tenant
+        :return:
+        """
+        return await self.post_operation(
+            self.PREFIX_LIST["MSSP_TENANTS"],
+            url=self.mssp_url,
+            json_data={"apiToken": tenant_token},
+        )
+
+    async def get_mssp_tenants(self):
+        """
+        Get a list of all tenants associated with the mssp portal associated with this mssp token
+        :return: a list of mssp tenant accounts
+        :rtype: list
+        """
+        return await self.get_operation(self.PREFIX_LIST["MSSP_TENANTS"], url=self.mssp_url)
+
+    async def remove_mssp_tenant(self, tenant_name):
+        """
+        Remove the given tenant from the MSSP portal associcated with the mssp token presented
+        :param tenant_name: the name of the tenant to remove from this mssp portal
+        :return:
+        """
+        return await self.delete_operation(f'{self.PREFIX_LIST["MSSP_TENANTS"]}/{tenant_name}', url=self.mssp_url)
+
+    async def get_mssp_devices(self, device_types=None, query=None):
+        """
+        Give an MSSP token, return devices in the mssp portal associated with that token for all customers
+        :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
+        :type: list
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: dict of device objects with associated attributes
+        :rtype: dict
+        """
+        devices = await self.get_operation(
+            self.PREFIX_LIST["MSSP_DEVICES"],
+            url=self.mssp_url,
+            params=CDOMSSPClient._mssp_device_query(device_types, query),
+        )
+        return self.transform_device_details(devices or [])
+
+    async def iter_mssp_devices(self, device_types=None, limit=200, max_workers=1, rate_limit=None, query=None):
+        """
+        Async generator that yields the devices in the mssp portal page by page, already transformed to readable values
+        :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
+        :type: list
+        :param limit: the number of devices to request per page
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: async generator of device objects with associated attributes
+        """
+        async for page in self.iter_pages(
+            self.PREFIX_LIST["MSSP_DEVICES"],
+            url=self.mssp_url,
+            params=CDOMSSPClient._mssp_device_query(device_types, query),
+            limit=limit,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+        ):
+            for device in self.transform_device_details(page):
+                yield device
+
+    transform_device_details = CDOMSSPClient.transform_device_details
+
+    mssp_tenant_index = staticmethod(CDOMSSPClient.mssp_tenant_index)
+
+    async def is_mssp_tenant_exists(self, tenant_org_name):
+        """
+        Check whether a tenant is already in the MSSP portal (case insensitive)
+        :param tenant_org_name: name of tenant we are searching for, or a tenant object with a "name"
+        :return: True if this customer name is already in the MSSP portal, false otherwiser
+        """
+        if isinstance(tenant_org_name, dict):
+            tenant_org_name = tenant_org_name["name"]
+        return tenant_org_name.lower() in self.mssp_tenant_index(await self.get_mssp_tenants() or [])
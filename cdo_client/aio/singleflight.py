@@ -0,0 +1,44 @@
+from ..singleflight import shared_outcome
+import asyncio
+
+
+class AsyncSingleFlight(object):
+    """
+    The asyncio flavour of SingleFlight. The call runs as a task of its own, so a caller that is cancelled while it
+    waits does not cancel the call for the other callers that joined it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        :param key: identifies the call, e.g. the URL, parameters and token of a GET
+        :param fn: coroutine function that makes the call, only called if no call for the key is in progress
+        :return: the result of the call and whether it was shared from another caller's call
+        :rtype: tuple
+        :raises: whatever the call raised, in every caller that joined it
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+            shared_outcome.set(True)
+        else:
+            self.calls += 1
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark it retrieved, the callers that awaited it have already seen it
+
+    @property
+    def in_flight(self):
+        """ The number of calls in progress """
+        return len(self._calls)
@@ -0,0 +1,31 @@
+from .base import AsyncCDOBaseClient
+from .watcher import AsyncJobWatcher
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDOStateMachines(AsyncCDOBaseClient):
+    """Class for performing CDO state machine operations with asyncio"""
+
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    async def get_state_jobs(self):
+        return await self.get_operation(self.PREFIX_LIST["JOBS"])
+
+    async def get_state_instances(self):
+        return await self.get_operation(self.PREFIX_LIST["INSTANCES"])
+
+    async def get_state_debugging(self):
+        return await self.get_operation(self.PREFIX_LIST["DEBUGGING"])
+
+    def watch_state_machines(self, kind="jobs", on_change=None, **kwargs):
+        """
+        :param kind: the endpoint to watch, one of jobs, instances or debugging
+        :param on_change: callable called with (watcher, events) after every poll that found changes
+        :param kwargs: the polling options of JobWatcher (min_interval, max_interval, backoff, is_active, name)
+        :return: a watcher to iterate over with `async for`, see AsyncJobWatcher
+        :rtype: AsyncJobWatcher
+        """
+        return AsyncJobWatcher(self, kind=kind, on_change=on_change, **kwargs)
@@ -0,0 +1,89 @@
+from .base import AsyncCDOBaseClient
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCDOTenants(AsyncCDOBaseClient):
+    """Class for performing CDO tenant operations with asyncio"""
+
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    async def get_tenants(self):
+        """
+        Get a list of all CDO tenants in this region
+        :return: list of tenants for which this user is entitled
+        :rtype: list
+        """
+        return await self.get_operation(self.PREFIX_LIST["TENANTS"])
+
+    async def search_tenants(self, search_value):
+        """
+        Search tenant names (case insensitive) for the search value provided. Note will include substring matches!
+        :param search_value: str to search for in tenant name
+        :return: list of matches to the search value
+        :rtype: list
+        """
+        tenants = await self.get_tenants()
+        if not tenants:
+            return []
+        return [tenant for tenant in tenants if search_value.lower() in tenant["name"].lower()]
+
+    async def get_tenant_context(self):
+        """
+        Returns details of the tenant, including UID, EULA acceptance timestamp, auto deployment schedules, etc.
+        :return: list of tenant details
+        :rtype: list
+        """
+        return await self.get_operation(self.PREFIX_LIST["TENANT_CONTEXT"])
+
+    async def get_tenant_users(self):
+        """
+        Returns a list of user objects for this tenant including name (email address), roles, apiTokenId and last login
+        :return: list of user objects
+        :rtype: list
+        """
+        return await self.get_operation(self.PREFIX_LIST["TENANT_USERS"])
+
+    async def get_tenant_user(self, uuid):
+        return await self.get_operation(
+            self.PREFIX_LIST["TENANT_USERS"],
+        )
+
+    async def add_tenant_user(self, username, role, is_api_user=False):
+        """
+        :param username:
+        :param role: user role: [ROLE_READ_ONLY, ROLE_ADMIN, ROLE_SUPER_ADMIN]
+        :param is_api_user: true if we are creating an API user
+        :return:
+        """
+        data = {"roles": role, "isApiOnlyUser": "true" if is_api_user else "false"}
+        return await self.post_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=data)
+
+    async def generate_tenant_user_api_token(self, username):
+        """
+        Given the username in format username@account (API) or username@email.com, generate an API token for that user
+        :param username: this could be an API only user or a regular user in this tenant
+        :return:
+        """
+        return await self.post_operation(f"{self.PREFIX_LIST['TENANT_TOKEN']}/{username}")
+
+    async def delete_tenant_user(self, uuid):
+        """
+        Given the uid of a user, delete the user from this tenant
+        :param uuid: the user uid
+        :type: str
+        :return: None
+        """
+        return await self.delete_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{uuid}")
+
+    async def update_tenant_user(self, username, role, is_api_user=False):
+        """
+        :param username: email address of user (or API username)
+        :param role: user role: [ROLE_READ_ONLY, ROLE_ADMIN, ROLE_SUPER_ADMIN]
+        :param is_api_user: true if we are creating an API user
+        :return:
+        """
+        data = {"roles": role, "isApiOnlyUser": "true" if is_api_user else "false"}
+        return await self.post_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=data)
@@ -0,0 +1,69 @@
+from ..watcher import JobWatcher
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncJobWatcher(JobWatcher):
+    """
+    JobWatcher for an AsyncCDOClient. Iterate over it with `async for event in watcher` to receive events as they are
+    found, the poll interval adapts to activity exactly as for JobWatcher.
+    """
+
+    async def fetch(self):
+        return await self.client.get_operation(self.endpoint, use_cache=False, raise_errors=True)
+
+    async def poll(self):
+        return self.update(await self.fetch())
+
+    def __iter__(self):
+        raise TypeError("AsyncJobWatcher is an async iterator, use `async for`")
+
+    async def __aiter__(self):
+        while True:
+            for event in await self.poll():
+                yield event
+            await asyncio.sleep(self.interval)
+
+    async def wait(self, timeout=None):
+        """
+        Poll until no job is active, e.g. to wait for a deploy to finish
+        :param timeout: give up after this many seconds
+        :return: True if every job finished, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            await self.poll()
+            if not self.differ.active:
+                return True
+            if deadline is not None and time.monotonic() + self.interval > deadline:
+                return False
+            await asyncio.sleep(self.interval)
+
+
+async def watch_all(watchers):
+    """
+    Run many watchers, e.g. one per tenant, on the running event loop and merge their events into one stream
+    :param watchers: iterable of AsyncJobWatcher
+    :return: async generator of (watcher, event) tuples
+    """
+    queue = asyncio.Queue()
+
+    async def run(watcher):
+        while True:
+            try:
+                for event in await watcher.poll():
+                    await queue.put((watcher, event))
+            except Exception as ex:
+                watcher.on_error(ex)
+            await asyncio.sleep(watcher.interval)
+
+    tasks = [asyncio.ensure_future(run(watcher)) for watcher in watchers]
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        for task in tasks:
+            task.cancel()
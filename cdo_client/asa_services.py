@@ -1,4 +1,7 @@
 from .base import CDOBaseClient
+from .bulk import iter_concurrent
+from .ratelimit import RateLimiter
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,69 +10,212 @@ logger = logging.getLogger(__name__)
 class CDOASAServices(CDOBaseClient):
     """Class for performing CDO ASA operations"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
         self.service_prefix = f"/aegis/rest/v{self.api_version}/services"
 
     # TODO: Full CRUD operations where available
     # TODO: packettracer method(s)
 
-    def get_asa_config_summary_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/configs")
+    @staticmethod
+    def _asa_params(resource, fields=None, params=None):
+        """ Add the resolve parameter that makes the API return only the given fields of each object """
+        params = dict(params or {})
+        if fields:
+            params["resolve"] = f"[{resource}.{{{','.join(fields)}}}]"
+        return params or None
+
+    def get_asa_list(self, resource, limit=None, offset=0, fields=None, params=None):
+        """
+        Get the objects of an ASA service collection, e.g. asa/nats
+        :param resource: the collection, relative to the services prefix
+        :param limit: the number of objects to return, None for all of them in one response
+        :param offset: the offset of the first object to return
+        :param fields: only return these fields of each object, e.g. ["uid", "name"]
+        :param params: Any other query parameters
+        :return: list of objects
+        :rtype: list
+        """
+        query = self._asa_params(resource, fields, params)
+        if limit is not None:
+            query = {**(query or {}), "limit": f"{limit}", "offset": f"{offset}"}
+        return self.get_operation(f"{self.service_prefix}/{resource}", params=query)
+
+    def iter_asa_list(
+        self, resource, fields=None, params=None, limit=200, max_workers=1, rate_limit=None, raise_errors=False
+    ):
+        """
+        Generator that walks an ASA service collection page by page, see CDOBaseClient.iter_pages
+        :param resource: the collection, relative to the services prefix, e.g. asa/nats
+        :param fields: only return these fields of each object, e.g. ["uid", "name"]
+        :param params: Any other query parameters
+        :param limit: the number of objects to request per page
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param raise_errors: raise the HTTPError of a page that cannot be read instead of ending the walk there
+        :return: generator of objects
+        :rtype: generator
+        """
+        return self.iter_records(
+            f"{self.service_prefix}/{resource}",
+            params=self._asa_params(resource, fields, params),
+            limit=limit,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            raise_errors=raise_errors,
+        )
+
+    def get_asa_batch(self, resource, uids, fields=None, params=None, max_workers=8, rate_limit=None):
+        """
+        Fetch many objects of an ASA service collection by uid concurrently, streaming each one as soon as it arrives
+        :param resource: the collection, relative to the services prefix, e.g. asa/configs
+        :param uids: iterable of object uids, consumed lazily
+        :param fields: only return these fields of each object
+        :param params: Any other query parameters
+        :param max_workers: the number of concurrent requests
+        :param rate_limit: the maximum number of requests per second on top of the region rate limit (None to disable)
+        :return: generator of (uid, object) tuples in completion order, the object is the exception if the fetch failed
+        :rtype: generator
+        """
+        limiter = RateLimiter(rate_limit)
+        query = self._asa_params(resource, fields, params)
+
+        def fetch(uid):
+            limiter.acquire()
+            return self.get_operation(f"{self.service_prefix}/{resource}/{uid}", params=query, raise_errors=True)
+
+        for uid, result, error in iter_concurrent(fetch, uids, max_workers=max_workers):
+            yield uid, result if error is None else error
+
+    def snapshot_asa_configs(
+        self,
+        store,
+        tenant,
+        resource="asa/configs",
+        version_fields=("lastUpdatedDate",),
+        max_workers=8,
+        rate_limit=None,
+        label=None,
+    ):
+        """
+        Take a snapshot of every config in an ASA service collection. Only the uid and version fields of each config
+        are listed; a full config is downloaded only when its version differs from the previous snapshot (or has no
+        version), unchanged configs are kept as references to the content already in the store.
+        :param store: the snapshot store
+        :type store: SnapshotStore
+        :param tenant: the name under which this tenant's snapshots are kept in the store
+        :param resource: the collection, relative to the services prefix, e.g. asa/configs or asa/devices-configs
+        :param version_fields: the fields that change whenever a config changes
+        :param max_workers: the number of configs downloaded concurrently
+        :param rate_limit: the maximum number of downloads per second on top of the region rate limit
+        :param label: an optional description of the snapshot
+        :return: the id of the new snapshot
+        :rtype: int
+        :raises: HTTPError if the collection cannot be listed in full, no snapshot is taken then so that the configs on
+            the missing pages are not reported as removed
+        """
+        previous_id = store.latest_snapshot(tenant)
+        previous = store.get_entries(previous_id) if previous_id is not None else {}
+        entries = {}
+        stale = {}
+        for summary in self.iter_asa_list(resource, fields=["uid", *version_fields], raise_errors=True):
+            values = [summary.get(field) for field in version_fields]
+            version = json.dumps(values) if any(value is not None for value in values) else None
+            known = previous.get(summary["uid"])
+            if version is not None and known is not None and known[1] == version:
+                entries[summary["uid"]] = known
+            else:
+                stale[summary["uid"]] = version
+        reused = len(entries)
+        failed = 0
+        for uid, config in self.get_asa_batch(resource, stale, max_workers=max_workers, rate_limit=rate_limit):
+            if isinstance(config, Exception):
+                failed += 1
+                if uid in previous:  # Keep the last known config, without a version so it is downloaded next time
+                    entries[uid] = (previous[uid][0], None)
+                continue
+            entries[uid] = (store.put(config), stale[uid])
+        snapshot_id = store.create_snapshot(tenant, entries, label=label)
+        logger.info(
+            f"Snapshot {snapshot_id} of {tenant}: {len(entries)} configs, {reused} unchanged, "
+            f"{len(stale) - failed} downloaded, {failed} failed"
+        )
+        return snapshot_id
+
+    def get_asa_config_summary_batch(self, device_uids, fields=None, max_workers=8, rate_limit=None):
+        return self.get_asa_batch(
+            "asa/configs", device_uids, fields=fields, max_workers=max_workers, rate_limit=rate_limit
+        )
+
+    def get_asa_nat_batch(self, nat_uids, fields=None, max_workers=8, rate_limit=None):
+        return self.get_asa_batch("asa/nats", nat_uids, fields=fields, max_workers=max_workers, rate_limit=rate_limit)
+
+    def get_asa_ordered_nats_batch(self, ordered_nats_uids, params=None, fields=None, max_workers=8, rate_limit=None):
+        return self.get_asa_batch(
+            "asa/orderednats",
+            ordered_nats_uids,
+            fields=fields,
+            params=params,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+        )
+
+    def get_asa_config_summary_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/configs", limit=limit, offset=offset, fields=fields)
 
     def get_asa_config_summary(self, device_uid):
         return self.get_operation(f"{self.service_prefix}/asa/configs/{device_uid}")
 
-    def get_asa_nats_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/nats")
+    def get_asa_nats_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/nats", limit=limit, offset=offset, fields=fields)
 
     def get_asa_nat(self, nat_uid):
         return self.get_operation(f"{self.service_prefix}/asa/nats/{nat_uid}")
 
-    def get_asa_twice_nat_events_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/twicenatevents")
+    def get_asa_twice_nat_events_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/twicenatevents", limit=limit, offset=offset, fields=fields)
 
     def get_asa_twice_nat_events(self, twice_nat_uid):
         return self.get_operation(f"{self.service_prefix}/asa/twicenatevents/{twice_nat_uid}")
 
-    def get_asa_exports_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/exports")
+    def get_asa_exports_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/exports", limit=limit, offset=offset, fields=fields)
 
     def get_asa_exports(self, export_uid):
         return self.get_operation(f"{self.service_prefix}/asa/exports/{export_uid}")
 
-    def get_asa_devices_configs_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/devices-configs")
+    def get_asa_devices_configs_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/devices-configs", limit=limit, offset=offset, fields=fields)
 
     def get_asa_devices_configs(self, devices_configs_uid):
         return self.get_operation(f"{self.service_prefix}/asa/devices-configs/{devices_configs_uid}")
 
-    def get_asa_templates_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/templates")
+    def get_asa_templates_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/templates", limit=limit, offset=offset, fields=fields)
 
     def get_asa_templates(self, template_uid):
         return self.get_operation(f"{self.service_prefix}/asa/templates/{template_uid}")
 
-    def get_asa_debug_events_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/debugevents")
+    def get_asa_debug_events_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/debugevents", limit=limit, offset=offset, fields=fields)
 
     def get_asa_debug_events(self, events_uid):
         return self.get_operation(f"{self.service_prefix}/asa/debugevents/{events_uid}")
 
-    def get_asa_ordered_nats_list(self, params):
-        return self.get_operation(f"{self.service_prefix}/asa/orderednats", params=params)
+    def get_asa_ordered_nats_list(self, params=None, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/orderednats", limit=limit, offset=offset, fields=fields, params=params)
 
     def get_asa_ordered_nats(self, ordered_nats_uid, params):
         return self.get_operation(f"{self.service_prefix}/asa/orderednats/{ordered_nats_uid}", params=params)
 
-    def get_asa_configs_exports_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/configs-exports")
+    def get_asa_configs_exports_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/configs-exports", limit=limit, offset=offset, fields=fields)
 
     def get_asa_configs_exports(self, configs_exports_uid):
         return self.get_operation(f"{self.service_prefix}/asa/configs-exports/{configs_exports_uid}")
 
-    def get_asa_nat_events_list(self):
-        return self.get_operation(f"{self.service_prefix}/asa/natevents")
+    def get_asa_nat_events_list(self, limit=None, offset=0, fields=None):
+        return self.get_asa_list("asa/natevents", limit=limit, offset=offset, fields=fields)
 
     def get_asa_nat_events(self, nat_events_uid):
         return self.get_operation(f"{self.service_prefix}/asa/natevents/{nat_events_uid}")
@@ -1,39 +1,154 @@
-from requests import session
 from functools import wraps
-from requests import HTTPError
+from requests import ConnectionError, ConnectTimeout, HTTPError, Timeout
+from urllib3.exceptions import ConnectTimeoutError
+from .decoders import decode_json, iter_json_array
 from .helpers import PREFIX_LIST, CDO_REGION, DEVICE_TYPES
+from .metrics import RequestSample, endpoint_template, request_attempt, take_connect_time
+from .ratelimit import RateLimiter, get_region_limiter
+from .retry import RetryPolicy
+from .singleflight import SingleFlight, shared_outcome
+from .transport import get_region_transport
+from .cache import ResponseCache
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeout in seconds of every request, the same read timeout as the asyncio transport
+DEFAULT_TIMEOUT = (10, 300)
+
 
 class CDOAPIWrapper(object):
     """This decorator class wraps all API methods of ths client and solves a number of issues and passes back details
-    of what method was called and the text of the error if it exists.
+    of what method was called and the text of the error if it exists. Pass raise_errors=True to a wrapped method to have
+    the HTTPError raised instead of logged, for callers that need to know which call failed and why. Otherwise an
+    HTTPError is logged and the method returns None, also once a transient error has used up all of its retries.
+    Methods that are not idempotent (e.g. POST) are wrapped with idempotent=False and are only retried when the request
+    cannot have been processed: on a 429, or when no connection could be opened. A POST whose response was lost is
+    never sent twice unless the caller passes retry_unsafe=True.
+    A call whose outcome was shared from an identical GET in flight (see SingleFlight) leaves the rate limiter alone,
+    the caller that made the request already let it know.
     """
 
+    def __init__(self, idempotent=True):
+        """
+        :param idempotent: whether the wrapped method may be retried after any transient error
+        """
+        self.idempotent = idempotent
+
     def __call__(self, fn):
         @wraps(fn)
-        def new_func(*args, **kwargs):
-            try:
-                return fn(*args, **kwargs)
-            except HTTPError as ex:
-                logger.debug(f"CDOAPIWrapper called by {fn.__name__}, but we got an unexpected HTTP response {ex}")
-                if ex.response.status_code == 400:
-                    error_msg = json.loads(ex.response.text)
-                    if error_msg["message"] == "Duplicate Tenant":
-                        logger.error("Tenant is already in this MSSP portal. Skipping...")
+        def new_func(*args, raise_errors=False, retry_unsafe=False, **kwargs):
+            client = args[0] if args else None
+            idempotent = self.idempotent or retry_unsafe
+            attempt = 0
+            while True:
+                attempt_token = request_attempt.set(attempt)
+                shared_token = shared_outcome.set(False)
+                try:
+                    result = fn(*args, **kwargs)
+                    if not shared_outcome.get():
+                        self.on_success(client)
+                    return result
+                except HTTPError as ex:
+                    delay = None
+                    if idempotent or self.is_unsent(ex):
+                        delay = self.get_retry_delay(client, fn, ex, attempt, shared=shared_outcome.get())
+                    if delay is None:
+                        if raise_errors:
+                            raise
+                        self.handle_http_error(fn, ex)
                         return
-                    else:
-                        logger.error(f"reqeusts.HTTPError raised.")
-                else:
-                    error_text = json.loads(ex.response.text)
-                    logger.error(f"Response Code: {error_text}")
-                logger.error(ex)
+                except (ConnectionError, Timeout) as ex:
+                    if not idempotent and not self.is_unsent(ex):
+                        raise
+                    delay = self.get_retry_delay(client, fn, ex, attempt, shared=shared_outcome.get())
+                    if delay is None:
+                        raise
+                finally:
+                    request_attempt.reset(attempt_token)
+                    shared_outcome.reset(shared_token)
+                time.sleep(delay)
+                attempt += 1
 
         return new_func
 
+    @staticmethod
+    def is_unsent(ex):
+        """
+        :param ex: the HTTPError, ConnectionError or Timeout a call failed with
+        :return: True if the API cannot have processed the request: it was throttled, or the connection was never made
+        """
+        if isinstance(ex, HTTPError):
+            return ex.response is not None and ex.response.status_code == 429
+        if isinstance(ex, ConnectTimeout):
+            return True
+        reason = ex.args[0] if ex.args else None
+        return isinstance(getattr(reason, "reason", reason), ConnectTimeoutError)  # Includes NewConnectionError
+
+    @staticmethod
+    def on_success(client):
+        """ Let the client's rate limiter know that the API accepted the call """
+        rate_limiter = getattr(client, "rate_limiter", None)
+        if rate_limiter:
+            rate_limiter.on_success()
+
+    @staticmethod
+    def get_retry_delay(client, fn, ex, attempt, shared=False):
+        """
+        Consult the client's retry policy about the failed call. A 429 also slows down the client's rate limiter, and
+        holds it back for the Retry-After period, so that every caller sharing the limiter backs off together.
+        :param client: the client instance the wrapped API method was called on
+        :param fn: the wrapped API method
+        :param ex: the HTTPError, ConnectionError or Timeout that was raised
+        :param attempt: the number of retries already made for this call
+        :param shared: the exception was shared from another caller's request, which already slowed the rate limiter
+        :return: the number of seconds to wait before retrying, or None if the error is not worth retrying or has used
+            up all of its retries
+        :rtype: float or None
+        """
+        retry_policy = getattr(client, "retry_policy", None) or RetryPolicy(max_retries=0)
+        response = ex.response if isinstance(ex, HTTPError) else None
+        if not retry_policy.is_retryable(response):
+            return None
+        delay = retry_policy.get_retry_delay(attempt, response)
+        if delay is None:
+            logger.error(f"{fn.__name__} failed after {attempt} retries: {ex}")
+            return None
+        rate_limiter = getattr(client, "rate_limiter", None)
+        if rate_limiter and not shared and response is not None and response.status_code == 429:
+            rate_limiter.on_throttled()
+            rate_limiter.pause(delay)
+        logger.warning(f"{fn.__name__} failed with {ex}, retrying in {delay:.2f}s (retry {attempt + 1})")
+        return delay
+
+    @staticmethod
+    def handle_http_error(fn, ex):
+        """
+        Log the details of an HTTPError raised by the wrapped API method
+        :param fn: the wrapped API method
+        :param ex: the HTTPError that was raised
+        :return: None
+        """
+        logger.debug(f"CDOAPIWrapper called by {fn.__name__}, but we got an unexpected HTTP response {ex}")
+        if ex.response.status_code == 400:
+            error_msg = json.loads(ex.response.text)
+            if error_msg["message"] == "Duplicate Tenant":
+                logger.error("Tenant is already in this MSSP portal. Skipping...")
+                return
+            else:
+                logger.error(f"reqeusts.HTTPError raised.")
+        else:
+            try:
+                error_text = json.loads(ex.response.text)
+            except ValueError:  # e.g. the HTML error page of a proxy in front of the API
+                error_text = ex.response.text
+            logger.error(f"Response Code: {error_text}")
+        logger.error(ex)
+
 
 class CDOBaseClient(object):
     """
@@ -41,10 +156,20 @@ class CDOBaseClient(object):
     by multiple inherited classes are provided
     """
 
-    def __init__(self, api_token, region, api_version="", verify=""):
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
         self.base_url = "https://" + CDO_REGION[region]
+        self.mssp_url = f"https://{PREFIX_LIST['MSSP_ENV']}"
         self.region = region
-        self.http_session = session()
+        self._transport = transport
+        self._http_session = None
+        self.headers = {}
+        self.rate_limiter = get_region_limiter(region)
+        self.retry_policy = RetryPolicy()
+        self.timeout = DEFAULT_TIMEOUT
+        self.response_cache = None
+        self.single_flight = SingleFlight()
+        self.metrics = None
+        self.json_loads = decode_json
         self.set_auth_header(api_token)
         self.verify = verify
         self.api_version = api_version
@@ -69,35 +194,237 @@ class CDOBaseClient(object):
             "MSSP_TENANTS": "/api/theia/v1/tenants",
         }
 
+    @property
+    def transport(self):
+        """ The transport the client's session draws its connections from, the region's shared one unless given one """
+        if self._transport is None:
+            self._transport = get_region_transport(self.region)
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport):
+        self._transport = transport
+
+    @property
+    def http_session(self):
+        """
+        The client's requests session. It is only created by the first request, so that short lived clients that never
+        make a call, or only make their first call much later, do not pay for it up front. The session holds no
+        credentials, the Authorization header is sent with each request (see auth_headers).
+        """
+        if self._http_session is None:
+            self._http_session = self.transport.create_session()
+        return self._http_session
+
+    @http_session.setter
+    def http_session(self, http_session):
+        self._http_session = http_session
+
     def set_auth_header(self, token):
-        """ Helper function to set the auth token header in the API request """
-        if "Authorization" in self.http_session.headers:
-            del self.http_session.headers["Authorization"]
-        self.http_session.headers["Authorization"] = f"Bearer {token.strip()}"
+        """
+        Helper function to set the auth token header in the API request. The headers are replaced rather than changed
+        in place, so a request that is being sent by another thread keeps the token it started with.
+        """
+        self.headers = {**self.headers, "Authorization": f"Bearer {token.strip()}"}
+
+    def auth_headers(self, token=None):
+        """
+        :param token: send the request with this token instead of the client's own
+        :return: the headers of a request made with the given token
+        :rtype: dict
+        """
+        if token is None:
+            return self.headers
+        return {**self.headers, "Authorization": f"Bearer {token.strip()}"}
+
+    def with_token(self, token):
+        """
+        Return a client for another token, e.g. a tenant's, that shares this client's transport (and so its keep-alive
+        connections), rate limiter, retry policy, response cache and metrics. Nothing is connected or handshaken anew.
+        :param token: the token the new client sends its requests with
+        :return: the new client
+        """
+        client = copy.copy(self)
+        client.transport = self.transport
+        client.http_session = None  # Sessions keep cookies, do not share them between tokens
+        client.set_auth_header(token)
+        return client
+
+    def _request(self, method, endpoint, url="", **kwargs):
+        """
+        Send a single request through the client's session once the rate limiter allows it
+        :param method: the HTTP method
+        :param endpoint: The path of the resource
+        :param url: Override the class base URL
+        :return: the response
+        :rtype: requests.Response
+        :raises: HTTPError on the response codes flagged by check_response_code
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.metrics is not None:
+            return self._instrumented_request(method, endpoint, url=url, **kwargs)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        api_response = self.http_session.request(method, (url or self.base_url) + endpoint, **kwargs)
+        error = self.check_response_code(api_response)
+        if error:
+            raise error
+        return api_response
+
+    def _instrumented_request(self, method, endpoint, url="", **kwargs):
+        """
+        _request that also records a RequestSample of the request in the client's metrics. The response carries the
+        sample as `sample` so that the operation can add the time it spent decoding the body.
+        """
+        sample = RequestSample(method, endpoint_template(endpoint), retries=request_attempt.get())
+        start = time.perf_counter()
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        take_connect_time()
+        sent = time.perf_counter()
+        sample.wait = sent - start
+        try:
+            api_response = self.http_session.request(method, (url or self.base_url) + endpoint, **kwargs)
+        except Exception as ex:
+            sample.connect = take_connect_time()
+            sample.server = max(time.perf_counter() - sent - sample.connect, 0.0)
+            sample.error = ex
+            self.metrics.record(sample)
+            raise
+        received = time.perf_counter() - sent
+        sample.connect = take_connect_time()
+        # response.elapsed runs until the headers were parsed and includes opening the connection
+        sample.server = max(min(api_response.elapsed.total_seconds(), received) - sample.connect, 0.0)
+        sample.transfer = max(received - sample.connect - sample.server, 0.0)
+        sample.status = api_response.status_code
+        if kwargs.get("stream"):
+            sample.bytes = int(api_response.headers.get("Content-Length") or 0)
+        else:
+            sample.bytes = len(api_response.content)
+        api_response.sample = sample
+        self.metrics.record(sample)
+        error = self.check_response_code(api_response)
+        if error:
+            raise error
+        return api_response
+
+    def _decode(self, api_response, content=None):
+        """
+        Decode a JSON response body, recording the decode time in the client's metrics
+        :param api_response: the response, None if the body came from the response cache
+        :param content: the body, defaults to the content of the response
+        :return: the decoded document
+        """
+        if content is None:
+            content = api_response.content
+        sample = getattr(api_response, "sample", None)
+        if sample is None:
+            return self.json_loads(content)
+        start = time.perf_counter()
+        data = self.json_loads(content)
+        self.metrics.record_decode(sample, time.perf_counter() - start)
+        return data
 
     @CDOAPIWrapper()
-    def get_operation(self, endpoint, params=None, headers="", url=""):
+    def get_operation(self, endpoint, params=None, headers="", url="", use_cache=True, raw=False, token=None):
         """
         Get the requested endpoint/resource from the API
         :param endpoint: The path of the resource we are attempting to retrieve
         :param params: Any query parameters that we wish to add to the path
         :param headers: Override the class headers if one presented here
         :param url: Override the class base URL
-        :return: dict of the requested data
+        :param use_cache: serve the request from the client's response_cache (if one is set) and share the response
+            of an identical GET that is already in flight (see single_flight). Pass False for a response that is no
+            older than the call.
+        :param raw: return the undecoded response body, for pipelines that pass the data straight through
+        :param token: send the request with this token instead of the client's own
+        :return: dict of the requested data (bytes if raw)
         """
-        if not headers:
-            headers = self.http_session.headers
-        if url:
-            api_response = self.http_session.get(url=url + endpoint, params=params, headers=headers)
+        if not use_cache or self.single_flight is None or headers:
+            api_response, content = self._fetch(endpoint, params, headers or self.auth_headers(token), url, use_cache)
         else:
-            api_response = self.http_session.get(url=self.base_url + endpoint, params=params, headers=headers)
-        error = self.check_response_code(api_response)
-        if error:
-            raise error
-        return json.loads(api_response.text)
+            # Callers that join an in flight GET only share its raw body, each one decodes its own objects
+            headers = self.auth_headers(token)
+            key = ResponseCache.make_key((url or self.base_url) + endpoint, params, headers.get("Authorization", ""))
+            (api_response, content), shared = self.single_flight.do(
+                key, lambda: self._fetch(endpoint, params, headers, url, use_cache)
+            )
+            if shared:
+                api_response = None
+        return content if raw else self._decode(api_response, content)
+
+    def _fetch(self, endpoint, params, headers, url, use_cache):
+        """
+        :return: the response (None if the body came from the response cache) and its raw body
+        :rtype: tuple
+        """
+        if self.response_cache is None or not use_cache:
+            api_response = self._request("GET", endpoint, url=url, params=params, headers=headers)
+            return api_response, api_response.content
+        return None, self._cached_get(endpoint, params=params, headers=headers, url=url)
 
     @CDOAPIWrapper()
-    def post_operation(self, endpoint, json_data=None, data=None, headers="", url=""):
+    def iter_operation(self, endpoint, params=None, headers="", url="", chunk_size=65536, token=None):
+        """
+        Get a (very large) JSON array from the API and parse it incrementally while it downloads, so that neither the
+        response body nor the whole decoded list are ever held in memory
+        :param endpoint: The path of the resource we are attempting to retrieve
+        :param params: Any query parameters that we wish to add to the path
+        :param headers: Override the class headers if one presented here
+        :param url: Override the class base URL
+        :param chunk_size: the number of bytes read from the connection at a time
+        :param token: send the request with this token instead of the client's own
+        :return: generator of the elements of the array (None if the request failed)
+        :rtype: generator
+        """
+        if not headers:
+            headers = self.auth_headers(token)
+        api_response = self._request("GET", endpoint, url=url, params=params, headers=headers, stream=True)
+        return self._iter_response(api_response, chunk_size)
+
+    @staticmethod
+    def _iter_response(api_response, chunk_size):
+        with api_response:  # Hand the connection back to the pool even if the caller stops early
+            yield from iter_json_array(api_response.iter_content(chunk_size=chunk_size))
+
+    def _cached_get(self, endpoint, params=None, headers=None, url=""):
+        """
+        Get the raw response body from the response cache. Fresh entries are returned without a request, stale entries
+        are revalidated with If-None-Match/If-Modified-Since when the server gave us an ETag or Last-Modified header.
+        :return: the raw response body
+        :rtype: bytes
+        """
+        cache_key = self.response_cache.make_key(
+            (url or self.base_url) + endpoint, params, headers.get("Authorization", "")
+        )
+        entry = self.response_cache.get(cache_key)
+        if entry is not None and entry.is_fresh:
+            return entry.content
+        if entry is not None and entry.validators:
+            headers = {**headers, **entry.validators}
+        api_response = self._request("GET", endpoint, url=url, params=params, headers=headers)
+        if api_response.status_code == 304 and entry is not None:
+            self.response_cache.refresh(cache_key)
+            return entry.content
+        self.response_cache.set(
+            cache_key,
+            api_response.content,
+            etag=api_response.headers.get("ETag"),
+            last_modified=api_response.headers.get("Last-Modified"),
+        )
+        return api_response.content
+
+    def invalidate_cache(self, endpoint, url=""):
+        """
+        Drop the cached responses that a write to the given endpoint may have changed
+        :param endpoint: the path that was written to
+        :param url: Override the class base URL
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate((url or self.base_url) + endpoint)
+
+    @CDOAPIWrapper(idempotent=False)
+    def post_operation(self, endpoint, json_data=None, data=None, headers="", url="", token=None):
         """
         Given the project endpoint, create a new object with the given post_data
         :param endpoint: Usually the GUID of the project where we wish to store our new object
@@ -105,62 +432,132 @@ class CDOBaseClient(object):
         :param json_data: If we are sending json payload (dict), give requests a hint on how to serialize it
         :param headers: Override the headers with one provided here
         :param url: Override the url with one provided here
+        :param token: send the request with this token instead of the client's own
         :return: the new object that was created
         """
         if not headers:
-            headers = self.http_session.headers
-        if url:
-            api_response = self.http_session.post(url=url + endpoint, data=data, json=json_data, headers=headers)
-        else:
-            api_response = self.http_session.post(
-                url=self.base_url + endpoint, data=data, json=json_data, headers=headers
-            )
-        error = self.check_response_code(api_response)
-        if error:
-            raise error
-        return json.loads(api_response.text)
+            headers = self.auth_headers(token)
+        api_response = self._request("POST", endpoint, url=url, data=data, json=json_data, headers=headers)
+        self.invalidate_cache(endpoint, url=url)
+        return self._decode(api_response)
 
     @CDOAPIWrapper()
-    def put_operation(self, endpoint, put_data=None, url=""):
+    def put_operation(self, endpoint, put_data=None, url="", token=None):
         """
         Given the endpoint, modify the object with the given put_data
         e.g. Modify Projects/c2e66d8d-a9e2-42d0-b4e3-0ddab7cc0462/Credentials/d7bf29d8-3390-4500-b78c-00e8955fcdb7
         :param endpoint: the API endpoint consisting of the GUIDs of the object we wish to modify (See above)
         :param put_data: Data model of the existing object with new values that we wish to store
         :param url: Override the class URL if one is presented here e.g. https://dev.mysite.com
+        :param token: send the request with this token instead of the client's own
         :return: returns the updated object
         """
-        if url:
-            api_response = self.http_session.put(url=url + endpoint, data=put_data)
-        else:
-            api_response = self.http_session.put(url=self.base_url + endpoint, data=put_data)
-        error = self.check_response_code(api_response)
-        if error:
-            raise error
+        api_response = self._request("PUT", endpoint, url=url, data=put_data, headers=self.auth_headers(token))
+        self.invalidate_cache(endpoint, url=url)
         return api_response
 
     @CDOAPIWrapper()
-    def delete_operation(self, endpoint, headers=None, url=None):
+    def delete_operation(self, endpoint, headers=None, url=None, token=None):
         """
         Given the endpoint, delete the object
         e.g. Delete Projects/c2e66d8d-a9e2-42d0-b4e3-0ddab7cc0462/Credentials/d7bf29d8-3390-4500-b78c-00e8955fcdb7
         :param endpoint: the path to the object we wish to delete.
         :param headers: Override the headers with one provided here
         :param url: Override the url with one provided here
+        :param token: send the request with this token instead of the client's own
         :return: None
         """
         if not headers:
-            headers = self.http_session.headers
-        if url:
-            api_response = self.http_session.delete(url=url + endpoint, headers=headers)
-        else:
-            api_response = self.http_session.delete(url=self.base_url + endpoint, headers=headers)
-        error = self.check_response_code(api_response)
-        if error:
-            raise error
+            headers = self.auth_headers(token)
+        self._request("DELETE", endpoint, url=url, headers=headers)
+        self.invalidate_cache(endpoint, url=url)
         logger.warning(f"Deleted {endpoint}")
         return
 
+    def iter_pages(
+        self,
+        endpoint,
+        params=None,
+        limit=100,
+        offset=0,
+        url="",
+        max_workers=1,
+        rate_limit=None,
+        token=None,
+        raise_errors=False,
+    ):
+        """
+        Generator that walks a paginated endpoint with limit/offset paging and yields one page (list) at a time.
+        Up to `max_workers` pages are requested concurrently, but pages are always yielded in offset order and paging
+        stops at the first short or empty page. At most one window of pages is held in memory at any time.
+        :param endpoint: The path of the resource we are attempting to retrieve
+        :param params: Any query parameters that we wish to add to the path (limit and offset are added for us)
+        :param limit: the number of records to request per page
+        :param offset: the offset of the first record to request
+        :param url: Override the class base URL
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param token: send the requests with this token instead of the client's own
+        :param raise_errors: raise the HTTPError of a page that cannot be read instead of ending the walk there, for
+            callers that must not mistake a failed page for the last one
+        :return: generator of pages
+        :rtype: generator
+        """
+        limiter = RateLimiter(rate_limit)
+
+        def get_page(page_offset):
+            limiter.acquire()
+            page_params = {**(params or {}), "limit": f"{limit}", "offset": f"{page_offset}"}
+            return self.get_operation(endpoint, params=page_params, url=url, token=token, raise_errors=raise_errors)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                offsets = [offset + (page * limit) for page in range(max_workers)]
+                futures = [executor.submit(get_page, page_offset) for page_offset in offsets]
+                try:
+                    for index, future in enumerate(futures):
+                        page = future.result()
+                        futures[index] = None  # Let go of the page once it has been handed to the caller
+                        if page:
+                            yield page
+                        if not page or len(page) < limit:  # This should be the last batch of records available
+                            return
+                finally:
+                    for pending in futures:
+                        if pending:
+                            pending.cancel()
+                offset = offsets[-1] + limit  # Every page in this window was full, there may be more!
+
+    def iter_records(
+        self,
+        endpoint,
+        params=None,
+        limit=100,
+        offset=0,
+        url="",
+        max_workers=1,
+        rate_limit=None,
+        token=None,
+        raise_errors=False,
+    ):
+        """
+        Generator that yields the individual records of a paginated endpoint. See iter_pages for the parameters.
+        :return: generator of records
+        :rtype: generator
+        """
+        for page in self.iter_pages(
+            endpoint,
+            params=params,
+            limit=limit,
+            offset=offset,
+            url=url,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            token=token,
+            raise_errors=raise_errors,
+        ):
+            yield from page
+
     def check_response_code(self, api_response):
         """
         :param api_response: The response object loaded from ths json returned by the requests library
@@ -168,12 +565,14 @@ class CDOBaseClient(object):
         :rtype: None or HTTPError
         """
         logger.debug(f"HTTP Response Code: {api_response.status_code}")
-        if 200 <= api_response.status_code <= 299:
+        if 200 <= api_response.status_code <= 299 or api_response.status_code == 304:
             return
         elif api_response.status_code == 401 or api_response.status_code == 403:
             return HTTPError(api_response.status_code, "Unauthorized", response=api_response)
         elif api_response.status_code == 400:
             return HTTPError(api_response.status_code, json.loads(api_response.text), response=api_response)
+        elif api_response.status_code == 429:
+            return HTTPError(api_response.status_code, "Too Many Requests", response=api_response)
         elif 500 <= api_response.status_code <= 599:
             return HTTPError(api_response.status_code, "Application Error", response=api_response)
         else:
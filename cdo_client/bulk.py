@@ -0,0 +1,79 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def iter_concurrent(fn, items, max_workers=8):
+    """
+    Call fn for every item on a bounded thread pool and yield the outcomes as they complete. Items are submitted
+    lazily, at most `max_workers` calls are in flight, so `items` may be a long (or endless) generator.
+    :param fn: callable that takes one item
+    :param items: iterable of items
+    :param max_workers: the number of concurrent calls
+    :return: generator of (item, result, error) tuples, error is the exception raised by fn (and result None)
+    :rtype: generator
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(fn, item): item for item in islice(items, max_workers)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    for next_item in islice(items, 1):
+                        pending[executor.submit(fn, next_item)] = next_item
+                    try:
+                        result = future.result()
+                    except Exception as ex:
+                        yield item, None, ex
+                    else:
+                        yield item, result, None
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class BulkReport(object):
+    """
+    Outcome of a bulk operation: which items succeeded, which were skipped and which failed, and why. `describe` renders
+    an item for the log, e.g. to keep secrets out of it.
+    """
+
+    def __init__(self, describe=str):
+        self.describe = describe
+        self.succeeded = []
+        self.skipped = []
+        self.failed = []
+
+    def succeed(self, item, result=None):
+        self.succeeded.append((item, result))
+
+    def skip(self, item, reason):
+        logger.info(f"Skipping {self.describe(item)}: {reason}")
+        self.skipped.append((item, reason))
+
+    def fail(self, item, error):
+        logger.error(f"Failed {self.describe(item)}: {error}")
+        self.failed.append((item, error))
+
+    @property
+    def ok(self):
+        """ True if nothing failed """
+        return not self.failed
+
+    @property
+    def summary(self):
+        """
+        :return: the number of items that succeeded, were skipped and failed
+        :rtype: dict
+        """
+        return {"succeeded": len(self.succeeded), "skipped": len(self.skipped), "failed": len(self.failed)}
+
+    def __len__(self):
+        return len(self.succeeded) + len(self.skipped) + len(self.failed)
+
+    def __repr__(self):
+        return f"BulkReport({self.summary})"
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import hashlib
+import threading
+import time
+
+
+class CacheEntry(object):
+    """A cached response body together with the validators needed to revalidate it with the server"""
+
+    __slots__ = ("content", "expires", "etag", "last_modified")
+
+    def __init__(self, content, expires, etag=None, last_modified=None):
+        self.content = content
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def is_fresh(self):
+        return time.monotonic() < self.expires
+
+    @property
+    def validators(self):
+        """
+        :return: the conditional request headers that revalidate this entry
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """
+    Thread safe TTL + LRU cache of GET response bodies, used by CDOBaseClient.get_operation. Responses are keyed by
+    URL, query parameters and token, and are stored as raw bytes so every hit is decoded into fresh objects that the
+    caller is free to modify. Expired entries that came with an ETag or Last-Modified header are kept around so they
+    can be revalidated with a conditional request instead of being downloaded again.
+    """
+
+    def __init__(self, ttl=60, maxsize=256):
+        """
+        :param ttl: number of seconds a response is served from the cache without asking the server
+        :param maxsize: the number of responses to keep, the least recently used response is evicted first
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url, params=None, token=""):
+        """
+        :param url: the full URL of the request
+        :param params: the query parameters of the request
+        :param token: the token (or Authorization header) the request is sent with
+        :return: the cache key of the request
+        :rtype: tuple
+        """
+        token_hash = hashlib.sha256(token.encode()).hexdigest() if token else ""
+        return url, tuple(sorted((str(key), str(value)) for key, value in (params or {}).items())), token_hash
+
+    def get(self, key):
+        """
+        :param key: the cache key of the request
+        :return: the cache entry, which may be stale, or None
+        :rtype: CacheEntry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, content, etag=None, last_modified=None):
+        """
+        :param key: the cache key of the request
+        :param content: the raw response body
+        :param etag: the ETag header of the response
+        :param last_modified: the Last-Modified header of the response
+        """
+        with self._lock:
+            self._entries[key] = CacheEntry(content, time.monotonic() + self.ttl, etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key):
+        """ The server confirmed that the entry is still current (304 Not Modified): restart its TTL """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl
+
+    def invalidate(self, url):
+        """
+        Drop every entry that a write to the given URL may have changed, i.e. every entry whose path is a prefix of the
+        URL's path (the collection the object belongs to) or that has the URL's path as a prefix (the object itself)
+        :param url: the full URL that was written to
+        :return: the number of entries dropped
+        :rtype: int
+        """
+        written = urlsplit(url)
+        written_path = written.path.rstrip("/")
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                cached = urlsplit(key[0])
+                cached_path = cached.path.rstrip("/")
+                if cached.netloc != written.netloc:
+                    continue
+                if f"{written_path}/".startswith(f"{cached_path}/") or f"{cached_path}/".startswith(f"{written_path}/"):
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,144 @@
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changelogs (
+    tenant TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    last_event_timestamp INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (tenant, uid)
+);
+CREATE INDEX IF NOT EXISTS changelogs_by_timestamp ON changelogs (tenant, last_event_timestamp);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tenant TEXT PRIMARY KEY,
+    last_event_timestamp INTEGER,
+    uid TEXT
+);
+"""
+TIMESTAMP = "IFNULL(last_event_timestamp, 0)"
+
+
+class ChangelogStore(object):
+    """
+    SQLite backed store of changelog records, keyed by tenant and changelog uid. Alongside the records it keeps a high
+    water mark per tenant (the newest lastEventTimestamp and the uid of the record it came from) so that
+    CDOChangeLogs.sync_changelogs only has to page through the changelogs that changed since the previous sync.
+    """
+
+    def __init__(self, path, page_size=500):
+        """
+        :param path: the path of the SQLite database file (":memory:" for a throwaway store)
+        :param page_size: the number of records read from the database at a time by iter_changelogs
+        """
+        self.path = path
+        self.page_size = page_size
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def get_high_water_mark(self, tenant):
+        """
+        :param tenant: the tenant name
+        :return: the newest lastEventTimestamp and its uid seen by the last sync, (None, None) if never synced
+        :rtype: tuple
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_event_timestamp, uid FROM sync_state WHERE tenant = ?", (tenant,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def set_high_water_mark(self, tenant, last_event_timestamp, uid):
+        """
+        :param tenant: the tenant name
+        :param last_event_timestamp: the newest lastEventTimestamp seen
+        :param uid: the uid of the changelog with that timestamp
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO sync_state (tenant, last_event_timestamp, uid) VALUES (?, ?, ?) "
+                "ON CONFLICT (tenant) DO UPDATE SET last_event_timestamp = excluded.last_event_timestamp, "
+                "uid = excluded.uid "
+                "WHERE IFNULL(excluded.last_event_timestamp, 0) >= IFNULL(sync_state.last_event_timestamp, 0)",
+                (tenant, last_event_timestamp, uid),
+            )
+
+    def upsert(self, tenant, changelogs):
+        """
+        Merge the given changelogs into the store. A changelog that is already stored is only replaced by a copy that
+        is at least as recent, so replaying an overlapping page never rolls a record back.
+        :param tenant: the tenant name
+        :param changelogs: iterable of changelog objects
+        :return: the number of changelogs inserted or updated
+        :rtype: int
+        """
+        rows = [
+            (tenant, item["uid"], item.get("lastEventTimestamp"), json.dumps(item, separators=(",", ":")))
+            for item in changelogs
+        ]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT INTO changelogs (tenant, uid, last_event_timestamp, record) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (tenant, uid) DO UPDATE SET last_event_timestamp = excluded.last_event_timestamp, "
+                "record = excluded.record "
+                "WHERE IFNULL(excluded.last_event_timestamp, 0) >= IFNULL(changelogs.last_event_timestamp, 0) "
+                "AND excluded.record != changelogs.record",
+                rows,
+            )
+            return self._connection.total_changes - before
+
+    def iter_changelogs(self, tenant, since=None):
+        """
+        Generator that yields the stored changelogs of a tenant, newest first
+        :param tenant: the tenant name
+        :param since: only yield changelogs with a lastEventTimestamp newer than this
+        :return: generator of changelog objects
+        :rtype: generator
+        """
+        query = f"SELECT {TIMESTAMP}, uid, record FROM changelogs WHERE tenant = ?"
+        params = [tenant]
+        if since is not None:
+            query += " AND last_event_timestamp > ?"
+            params.append(since)
+        cursor = None
+        while True:  # Keyset paging keeps memory flat and never holds the lock while the caller works
+            page_query, page_params = query, params
+            if cursor:
+                page_query += f" AND ({TIMESTAMP} < ? OR ({TIMESTAMP} = ? AND uid < ?))"
+                page_params = [*params, cursor[0], cursor[0], cursor[1]]
+            with self._lock:
+                rows = self._connection.execute(
+                    f"{page_query} ORDER BY {TIMESTAMP} DESC, uid DESC LIMIT ?",
+                    [*page_params, self.page_size],
+                ).fetchall()
+            for _, _, record in rows:
+                yield json.loads(record)
+            if len(rows) < self.page_size:
+                return
+            cursor = rows[-1][:2]
+
+    def count(self, tenant):
+        """
+        :param tenant: the tenant name
+        :return: the number of changelogs stored for the tenant
+        :rtype: int
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM changelogs WHERE tenant = ?", (tenant,)).fetchone()
+        return row[0]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
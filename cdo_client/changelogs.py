@@ -1,40 +1,151 @@
 from .base import CDOBaseClient
+from .export import changelogs_to_dataframes
+from .models import ChangeLog
 import logging
-import time
 
 logger = logging.getLogger(__name__)
 
+CHANGELOG_RESOLVE = (
+    "[changelogs/query.{uid,name,lastEventTimestamp,changeLogState,objectReference,lastEventDescription,lastEventUser,"
+    "events}]"
+)
+CHANGELOGS_RESOURCE = "changelogs/query"
+
+
+def changelog_params(sort, query=None):
+    """
+    :param sort: Order in which to sort the returned records
+    :param query: a Query of the filters to apply and the fields to return, by default every field in CHANGELOG_RESOLVE
+    :return: the query parameters of a changelog query
+    :rtype: dict
+    """
+    params = {"resolve": CHANGELOG_RESOLVE, "sort": f"{sort}"}
+    if query is not None:
+        params.update(query.params(CHANGELOGS_RESOURCE))
+    return params
+
 
 class CDOChangeLogs(CDOBaseClient):
     """Class for performing getting changelogs from a CDO tenant"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
+
+    def iter_changelogs(
+        self,
+        limit=100,
+        offset=0,
+        sort="lastEventTimestamp:desc",
+        max_workers=4,
+        rate_limit=None,
+        as_records=False,
+        query=None,
+        raise_errors=False,
+    ):
+        """
+        Generator that yields changelog objects page by page, in the requested sort order
+        :param limit: the number of records to return at one time (API MAX = 200)
+        :param offset: user for paging records over multiple api calls
+        :param sort: Order in which to sort the returned records
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second on top of the region rate limit
+        :param as_records: yield compact ChangeLog records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :param raise_errors: raise the HTTPError of a page that cannot be read instead of ending the walk there
+        :return: generator of changelog objects
+        :rtype: generator
+        """
+        changelogs = self.iter_records(
+            self.PREFIX_LIST["CHANGELOG_QUERY"],
+            params=changelog_params(sort, query),
+            limit=limit,
+            offset=offset,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            raise_errors=raise_errors,
+        )
+        return map(ChangeLog.from_dict, changelogs) if as_records else changelogs
 
-    def get_all_changelogs(self, limit=100, offset=0, sort="lastEventTimestamp:desc"):
+    def get_all_changelogs(
+        self,
+        limit=100,
+        offset=0,
+        sort="lastEventTimestamp:desc",
+        max_workers=4,
+        rate_limit=None,
+        as_records=False,
+        query=None,
+    ):
         """
-        Return a list of all objects
+        Return a list of all objects. Pages are requested `max_workers` offsets at a time and reassembled in offset
+        order so the records come back in the same order as a sequential walk of the pages would return them.
         :param limit: the number of records to return at one time (API MAX = 200)
         :param offset: user for paging records over multiple api calls
         :param sort: Order in which to sort the returned records
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second on top of the region rate limit
+        :param as_records: return compact ChangeLog records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
         :return list: return a list containing changelog objects
         """
-        change_records = []
-        search = {
-            "limit": f"{limit}",
-            "offset": f"{offset}",
-            "resolve": "[changelogs/query.{uid,name,lastEventTimestamp,changeLogState,objectReference,lastEventDescription,lastEventUser,events}]",
-            "sort": f"{sort}",
-        }
-        while True:
-            time.sleep(1)
-            test = self.get_operation(f"{self.PREFIX_LIST['CHANGELOG_QUERY']}", params=search)
-            if test:
-                change_records[len(change_records) :] = test  # Add this batch of changes to the end of the list
-                if len(test) == limit:  # We got the limit of records there may be more!
-                    search["offset"] = str(int(search["offset"]) + limit)  # get the next batch this many into the set
-                else:
-                    break  # This should be the last batch of records available
-            else:
-                break  # No records were returned
-        return change_records
+        return list(
+            self.iter_changelogs(
+                limit=limit,
+                offset=offset,
+                sort=sort,
+                max_workers=max_workers,
+                rate_limit=rate_limit,
+                as_records=as_records,
+                query=query,
+            )
+        )
+
+    def get_changelogs_dataframes(self, limit=100, sort="lastEventTimestamp:desc", max_workers=4, query=None):
+        """
+        Return all changelogs as a changelog table and a child table of their events (requires pandas)
+        :param limit: the number of records to return at one time (API MAX = 200)
+        :param sort: Order in which to sort the returned records
+        :param max_workers: the number of pages to request concurrently
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: (changelogs, events) DataFrames, see export.changelogs_to_dataframes
+        :rtype: tuple
+        """
+        changelogs = self.iter_changelogs(limit=limit, sort=sort, max_workers=max_workers, query=query)
+        return changelogs_to_dataframes(changelogs)
+
+    def sync_changelogs(self, store, tenant, limit=100, max_workers=1):
+        """
+        Incrementally sync this tenant's changelogs into a local store. Changelogs are paged newest first and paging
+        stops at the first changelog older than the newest one seen by the previous sync, so a sync only downloads
+        what changed since then. Changelogs are merged into the store by uid, so records that gained new events are
+        updated in place rather than duplicated.
+        :param store: the local store to sync into
+        :type store: ChangelogStore
+        :param tenant: the name under which this tenant's changelogs are kept in the store
+        :param limit: the number of records to return at one time (API MAX = 200)
+        :param max_workers: the number of pages to request concurrently
+        :return: the number of changelogs inserted or updated in the store
+        :rtype: int
+        :raises: HTTPError if a page cannot be read. The high water mark is only moved once the walk has reached the
+            previous one or the last page, so the next sync fetches whatever this one missed.
+        """
+        high_water_mark, _ = store.get_high_water_mark(tenant)
+        newest = None
+        written = 0
+        batch = []
+        for changelog in self.iter_changelogs(limit=limit, max_workers=max_workers, raise_errors=True):
+            timestamp = changelog.get("lastEventTimestamp")
+            if newest is None:
+                newest = (timestamp, changelog["uid"])
+            if high_water_mark is not None and timestamp is not None and timestamp < high_water_mark:
+                break  # Everything from here on was already stored by a previous sync
+            batch.append(changelog)
+            if len(batch) >= limit:
+                written += store.upsert(tenant, batch)
+                batch = []
+        if batch:
+            written += store.upsert(tenant, batch)
+        if newest is not None and newest[0] is not None:
+            store.set_high_water_mark(tenant, *newest)
+        logger.info(f"Synced {written} changelogs for tenant {tenant}")
+        return written
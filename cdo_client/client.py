@@ -0,0 +1,15 @@
+from .tenants import CDOTenants
+from .base import CDOBaseClient
+from .devices import CDODevices
+from .changelogs import CDOChangeLogs
+from .state_machine import CDOStateMachines
+from .mssp import CDOMSSPClient
+
+
+class CDOClient(CDOTenants, CDODevices, CDOChangeLogs, CDOStateMachines, CDOMSSPClient):
+    """
+    This package brings provides API access to Cisco Defense Orchestrator (CDO)
+    """
+
+    def __init__(self, api_token, region, api_version="1", verify="", transport=None):
+        CDOBaseClient.__init__(self, api_token, region, api_version=api_version, verify=verify, transport=transport)
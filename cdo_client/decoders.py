@@ -0,0 +1,110 @@
+import codecs
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+except ImportError:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+def _is_number(value):
+    return type(value) in (int, float)
+
+
+def decode_json(content):
+    """
+    Decode a JSON document straight from the response bytes (no intermediate str), using orjson when it is installed
+    :param content: the raw response body
+    :type content: bytes
+    :return: the decoded document
+    """
+    return _loads(content)
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally parse a top level JSON array, yielding each element as soon as it has been received. Only the element
+    being parsed and the unparsed tail of the input are held in memory, never the whole document.
+    :param chunks: iterable of bytes, e.g. requests.Response.iter_content(chunk_size)
+    :return: generator of the elements of the array
+    :rtype: generator
+    :raises: ValueError if the input is not a JSON array
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    started = False
+    exhausted = False
+    expect_value = True  # After "[" or ",", else a "," or "]" must come next
+    empty = True
+
+    def read_more():
+        nonlocal buffer, position, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer = buffer[position:] + text_decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position >= len(buffer):
+            if exhausted:
+                raise ValueError("Unexpected end of JSON array")
+            read_more()
+            continue
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            if expect_value and not empty:
+                raise ValueError("Expected a value before ']'")
+            position += 1
+            while True:  # Only whitespace may follow the array, as with json.loads
+                if buffer[position:].strip(_WHITESPACE):
+                    raise ValueError("Extra data after the JSON array")
+                if exhausted:
+                    return
+                position = len(buffer)
+                read_more()
+        if not expect_value:
+            if buffer[position] != ",":
+                raise ValueError("Expected ',' or ']' between values")
+            expect_value = True
+            position += 1
+            continue
+        if buffer[position] == ",":
+            raise ValueError("Expected a value before ','")
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            read_more()
+            continue
+        if not exhausted and (end >= len(buffer) or _is_number(element) and not buffer[end:].strip(_NUMBER_CHARACTERS)):
+            # A number or literal may continue in the next chunk (e.g. "2." was decoded as 2), parse it again once we
+            # know it ended
+            read_more()
+            continue
+        position = end
+        expect_value = empty = False
+        yield element
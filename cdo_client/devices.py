@@ -1,23 +1,69 @@
 from .base import CDOBaseClient
+from .export import devices_to_dataframe
+from .models import Device
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEVICES_RESOURCE = "targets/devices"
+
 
 class CDODevices(CDOBaseClient):
     """Class for performing actions on devices in a CDO tenant"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
 
-    def get_devices(self, search=""):
+    def get_devices(self, search="", as_records=False, query=None):
         """
         :param search: Optional return devices that have a name, IP address, or interface that matches our search string
+        :param as_records: return compact Device records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return
         :return: list of devices with all device attributes
         :rtype: list
         """
+        devices = self.get_operation(self.PREFIX_LIST["DEVICES"], params=self._device_search_params(search, query))
+        return Device.from_list(devices) if as_records else devices
+
+    def iter_devices(
+        self, search="", limit=200, max_workers=1, rate_limit=None, as_records=False, query=None, raise_errors=False
+    ):
+        """
+        Generator that yields devices page by page instead of returning the whole inventory at once
+        :param search: Optional return devices that have a name, IP address, or interface that matches our search string
+        :param limit: the number of devices to request per page
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param as_records: yield compact Device records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return
+        :param raise_errors: raise the HTTPError of a page that cannot be read instead of ending the walk there
+        :return: generator of devices with all device attributes
+        :rtype: generator
+        """
+        devices = self.iter_records(
+            self.PREFIX_LIST["DEVICES"],
+            params=self._device_search_params(search, query),
+            limit=limit,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            raise_errors=raise_errors,
+        )
+        return map(Device.from_dict, devices) if as_records else devices
+
+    def get_devices_dataframe(self, search="", query=None):
+        """
+        :param search: Optional return devices that have a name, IP address, or interface that matches our search string
+        :param query: a Query of the filters to apply and the fields to return
+        :return: DataFrame with one row per device (requires pandas)
+        :rtype: pandas.DataFrame
+        """
+        return devices_to_dataframe(self.iter_devices(search=search, query=query))
+
+    @staticmethod
+    def _device_search_params(search, query=None):
+        """ Build the wildcard query used to search devices by name, IP address, serial or interface """
+        if query is not None:
+            return query.copy().search(search).params(DEVICES_RESOURCE)
         if search:
-            params = {"q": f"(name:*{search}*) OR (ipv4:*{search}*) OR (serial:*{search}*) OR (interfaces:*{search}*)"}
-        else:
-            params = None
-        return self.get_operation(self.PREFIX_LIST["DEVICES"], params=params)
+            return {"q": f"(name:*{search}*) OR (ipv4:*{search}*) OR (serial:*{search}*) OR (interfaces:*{search}*)"}
+        return None
@@ -0,0 +1,177 @@
+from itertools import islice
+from .transforms import DEVICE_DECODERS
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORICAL_COLUMNS = ("deviceType", "connectivityState", "cdoRegion", "changeLogState", "deviceRole", "modelNumber")
+TIMESTAMP_COLUMNS = ("lastEventTimestamp",)
+
+
+def _pandas():
+    """ pandas is only imported when a DataFrame is actually requested """
+    try:
+        import pandas
+    except ImportError as ex:
+        raise ImportError("DataFrame export requires pandas, install it with `pip install pandas`") from ex
+    return pandas
+
+
+def _chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _concat(frames, categorical_columns):
+    """
+    Concatenate DataFrames built chunk by chunk. Categorical columns are combined with union_categoricals so that they
+    never have to be expanded back into Python objects.
+    """
+    pd = _pandas()
+    from pandas.api.types import union_categoricals
+
+    if not frames:
+        return pd.DataFrame()
+    categoricals = {}
+    for column in categorical_columns:
+        if any(column in frame for frame in frames):
+            parts = [frame[column] if column in frame else pd.Categorical([None] * len(frame)) for frame in frames]
+            try:
+                categoricals[column] = union_categoricals(parts, ignore_order=True)
+            except TypeError:  # The chunks disagree on the type of the categories (e.g. an unknown numeric code)
+                categoricals[column] = pd.Categorical(pd.concat([pd.Series(part, dtype=object) for part in parts]))
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+    frame = pd.concat([frame.drop(columns=list(categoricals), errors="ignore") for frame in frames], ignore_index=True)
+    for column, values in categoricals.items():
+        frame[column] = values
+    return frame[columns]
+
+
+def decode_series(series, mapping):
+    """
+    Vectorised code to label mapping of a column: only the distinct values are looked up and the labels are then
+    gathered for the whole column at once. Values that are not in the mapping are kept as strings instead of raising,
+    so already decoded labels pass through untouched.
+    :param series: the column to decode
+    :type series: pandas.Series
+    :param mapping: dict of code to label
+    :return: the decoded column
+    :rtype: pandas.Series
+    """
+    pd = _pandas()
+    import numpy
+
+    codes, uniques = pd.factorize(series)
+    labels = numpy.asarray([mapping.get(value, str(value)) for value in uniques] + [None], dtype=object)
+    return pd.Series(labels[codes], index=series.index, name=series.name)  # code -1 (missing) picks the final None
+
+
+def records_to_dataframe(
+    records,
+    chunk_size=5000,
+    categorical_columns=CATEGORICAL_COLUMNS,
+    timestamp_columns=TIMESTAMP_COLUMNS,
+    decoders=None,
+):
+    """
+    Build a DataFrame from an iterable of records (e.g. one of the iter_* generators) without ever holding the whole
+    list of dicts in memory: records are converted chunk by chunk and enum-like columns are stored as categoricals.
+    :param records: iterable of dicts
+    :param chunk_size: the number of records converted at a time
+    :param categorical_columns: the columns stored as pandas categoricals
+    :param timestamp_columns: the epoch millisecond columns converted to UTC datetimes
+    :param decoders: dict of column name to a code to label mapping applied to that column
+    :return: the DataFrame
+    :rtype: pandas.DataFrame
+    """
+    pd = _pandas()
+    frames = []
+    for chunk in _chunks(records, chunk_size):
+        frame = pd.DataFrame.from_records(chunk)
+        del chunk
+        for column, mapping in (decoders or {}).items():
+            if column in frame:
+                frame[column] = decode_series(frame[column], mapping)
+        for column in categorical_columns:
+            if column in frame:
+                frame[column] = frame[column].astype("category")
+        for column in timestamp_columns:
+            if column in frame:
+                frame[column] = pd.to_datetime(frame[column], unit="ms", utc=True, errors="coerce")
+        frames.append(frame)
+    return _concat(frames, categorical_columns)
+
+
+def devices_to_dataframe(devices, chunk_size=5000):
+    """
+    :param devices: iterable of device objects, either raw from the API or already transformed
+    :return: DataFrame with one row per device, connectivityState and cdoRegion decoded to their labels
+    :rtype: pandas.DataFrame
+    """
+    return records_to_dataframe(devices, chunk_size=chunk_size, decoders=DEVICE_DECODERS)
+
+
+def tenants_to_dataframe(tenants, chunk_size=5000):
+    """
+    :param tenants: iterable of tenant objects
+    :return: DataFrame with one row per tenant
+    :rtype: pandas.DataFrame
+    """
+    return records_to_dataframe(tenants, chunk_size=chunk_size)
+
+
+def changelogs_to_dataframes(changelogs, chunk_size=5000):
+    """
+    Split changelogs into a changelog table and a child table of their (nested) events
+    :param changelogs: iterable of changelog objects
+    :return: (changelogs, events) DataFrames. The events table has one row per event, its nested attributes flattened
+        into dotted column names, and a changelogUid column that refers back to the changelog it belongs to
+    :rtype: tuple
+    """
+    pd = _pandas()
+    changelog_frames = []
+    event_frames = []
+    for chunk in _chunks(changelogs, chunk_size):
+        events = []
+        for changelog in chunk:
+            for event in changelog.get("events") or []:
+                events.append({**event, "changelogUid": changelog.get("uid")})
+        rows = [{key: value for key, value in changelog.items() if key != "events"} for changelog in chunk]
+        del chunk
+        changelog_frames.append(records_to_dataframe(rows, chunk_size=chunk_size))
+        if events:
+            event_frames.append(pd.json_normalize(events))
+    changelog_frame = _concat(changelog_frames, CATEGORICAL_COLUMNS)
+    events_frame = pd.concat(event_frames, ignore_index=True) if event_frames else pd.DataFrame()
+    if "changelogUid" in events_frame:
+        events_frame["changelogUid"] = events_frame["changelogUid"].astype("category")
+    return changelog_frame, events_frame
+
+
+def to_arrow(frame):
+    """
+    :param frame: a DataFrame built by this module
+    :return: the equivalent Arrow table, categoricals become dictionary encoded columns
+    :rtype: pyarrow.Table
+    """
+    try:
+        import pyarrow
+    except ImportError as ex:
+        raise ImportError("Arrow export requires pyarrow, install it with `pip install pyarrow`") from ex
+    return pyarrow.Table.from_pandas(frame, preserve_index=False)
+
+
+def to_parquet(frame, path, compression="snappy"):
+    """
+    :param frame: a DataFrame built by this module
+    :param path: the file to write
+    :param compression: the parquet compression codec
+    """
+    table = to_arrow(frame)
+    from pyarrow import parquet
+
+    parquet.write_table(table, path, compression=compression)
@@ -0,0 +1,114 @@
+from .transport import CDOTransport
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CDOFleetExecutor(object):
+    """
+    Run the same CDOClient method across many tenants at once. Every region gets its own bounded worker pool so a slow
+    region never holds up the tenants of another region, and results are streamed back as soon as each tenant is done:
+
+        fleet = CDOFleetExecutor({"tenant-a": (token_a, "us"), "tenant-b": (token_b, "eu")}, region_limits={"eu": 4})
+        for tenant, devices in fleet.run("get_devices"):
+            ...
+    """
+
+    def __init__(
+        self,
+        tenants,
+        max_workers=8,
+        region_limits=None,
+        client_class=None,
+        api_version="1",
+        transport=None,
+        metrics=None,
+    ):
+        """
+        :param tenants: mapping of tenant name to a (token, region) tuple
+        :type tenants: dict
+        :param max_workers: the number of concurrent calls per region unless overridden in region_limits
+        :param region_limits: mapping of region to the number of concurrent calls allowed in that region
+        :type region_limits: dict
+        :param client_class: the client class to instantiate for each tenant (defaults to CDOClient)
+        :param api_version: the api version passed to each client
+        :param transport: the CDOTransport shared by all of the tenant clients. By default one is created with enough
+            pooled connections per host for the largest region limit, so tenants in the same region reuse connections
+        :param metrics: a RequestMetrics shared by all of the tenant clients, to measure the whole fleet in one place
+        """
+        self.tenants = tenants
+        self.max_workers = max_workers
+        self.region_limits = region_limits or {}
+        self.client_class = client_class
+        self.api_version = api_version
+        self.transport = transport or CDOTransport(pool_maxsize=max([max_workers, *self.region_limits.values()]))
+        self.metrics = metrics
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def get_client(self, tenant):
+        """
+        Return the client for the given tenant, creating it on first use so it can be reused by later runs
+        :param tenant: the tenant name
+        :return: the client for this tenant
+        """
+        with self._clients_lock:
+            if tenant not in self._clients:
+                token, region = self.tenants[tenant]
+                if self.client_class is None:
+                    from .client import CDOClient
+
+                    self.client_class = CDOClient
+                client = self.client_class(token, region, api_version=self.api_version, transport=self.transport)
+                client.metrics = self.metrics
+                self._clients[tenant] = client
+            return self._clients[tenant]
+
+    def _call(self, tenant, method, args, kwargs):
+        client = self.get_client(tenant)
+        if callable(method):
+            return method(client, *args, **kwargs)
+        return getattr(client, method)(*args, **kwargs)
+
+    def run(self, method, *args, **kwargs):
+        """
+        Call the given method for every tenant and yield the results in the order in which they complete
+        :param method: the name of a CDOClient method (e.g. "get_devices") or a callable that takes the client as its
+            first argument
+        :param args: positional arguments passed to the method
+        :param kwargs: keyword arguments passed to the method
+        :return: generator of (tenant, result) tuples, where result is the exception raised if the call failed
+        :rtype: generator
+        """
+        executors = {}
+        futures = {}
+        try:
+            for tenant, (token, region) in self.tenants.items():
+                if region not in executors:
+                    executors[region] = ThreadPoolExecutor(
+                        max_workers=self.region_limits.get(region, self.max_workers),
+                        thread_name_prefix=f"cdo-fleet-{region}",
+                    )
+                futures[executors[region].submit(self._call, tenant, method, args, kwargs)] = tenant
+            for future in as_completed(futures):
+                tenant = futures.pop(future)
+                try:
+                    yield tenant, future.result()
+                except Exception as ex:
+                    logger.error(f"Tenant {tenant} failed: {ex}")
+                    yield tenant, ex
+        finally:
+            for future in futures:
+                future.cancel()
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+    def run_all(self, method, *args, **kwargs):
+        """
+        Same as run(), but wait for all tenants and return the results
+        :return: dict of tenant name to result (or the exception raised)
+        :rtype: dict
+        """
+        return dict(self.run(method, *args, **kwargs))
@@ -0,0 +1,245 @@
+from bisect import bisect_left, bisect_right
+import ipaddress
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_FIELDS = ("serial", "name", "ipv4")
+GROUP_FIELDS = ("deviceType", "connectivityState", "organizationName")
+
+
+def _lookup_key(field, value):
+    """ Normalise a value for the lookup indexes: case insensitive, and the ipv4 index ignores any port """
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if field == "ipv4":
+        value = value.split("/")[0]
+        if value.count(":") == 1:  # address:port
+            value = value.split(":")[0]
+    return value or None
+
+
+class FleetInventory(object):
+    """
+    In memory inventory of devices with hash indexes on uid, serial, name and ipv4, a sorted index of ipv4 addresses
+    for subnet searches and pre-computed groups by deviceType, connectivityState and organizationName. Build it once
+    from a client and resolve devices locally instead of sending a search query per lookup:
+
+        inventory = FleetInventory.from_mssp(mssp_client)
+        device = inventory.get_by_serial("JAD12345678")
+        offline = inventory.group("connectivityState", "OFFLINE")
+    """
+
+    def __init__(self, devices=(), loader=None):
+        """
+        :param devices: iterable of device objects
+        :param loader: callable that returns the current devices, used by refresh(). It must raise rather than stop
+            early when the devices cannot all be read, or refresh() would drop the devices it did not get to.
+        """
+        self.loader = loader
+        self._devices = {}
+        self._lookups = {field: {} for field in LOOKUP_FIELDS}
+        self._groups = {field: {} for field in GROUP_FIELDS}
+        self._sorted_ipv4 = None
+        self.update(devices)
+
+    @classmethod
+    def from_mssp(cls, client, device_types=None):
+        """
+        :param client: a client with MSSP entitlements
+        :type client: CDOMSSPClient
+        :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
+        :return: the inventory of every device in the MSSP portal
+        :rtype: FleetInventory
+        """
+        loader = lambda: client.iter_mssp_devices(device_types=device_types, raise_errors=True)  # noqa: E731
+        return cls(loader(), loader=loader)
+
+    @classmethod
+    def from_devices(cls, client, search=""):
+        """
+        :param client: a tenant client
+        :type client: CDODevices
+        :param search: Optional only include devices that match our search string
+        :return: the inventory of the devices in the client's tenant
+        :rtype: FleetInventory
+        """
+        loader = lambda: client.iter_devices(search=search, raise_errors=True)  # noqa: E731
+        return cls(loader(), loader=loader)
+
+    @staticmethod
+    def device_key(device):
+        return device.get("uid") or f"{device.get('serial')}/{device.get('name')}"
+
+    def _index(self, key, device):
+        for field, index in self._lookups.items():
+            value = _lookup_key(field, device.get(field))
+            if value is not None:
+                index.setdefault(value, {})[key] = device
+        for field, groups in self._groups.items():
+            groups.setdefault(device.get(field), {})[key] = device
+        self._sorted_ipv4 = None
+
+    def _unindex(self, key, device):
+        for field, index in self._lookups.items():
+            value = _lookup_key(field, device.get(field))
+            matches = index.get(value)
+            if matches is not None:
+                matches.pop(key, None)
+                if not matches:
+                    del index[value]
+        for field, groups in self._groups.items():
+            members = groups.get(device.get(field))
+            if members is not None:
+                members.pop(key, None)
+                if not members:
+                    del groups[device.get(field)]
+        self._sorted_ipv4 = None
+
+    def add(self, device):
+        """
+        Add a device, replacing any device with the same uid
+        :param device: the device object
+        :return: True if the device is new or changed
+        :rtype: bool
+        """
+        key = self.device_key(device)
+        existing = self._devices.get(key)
+        if existing is not None:
+            if existing == device:
+                return False
+            self._unindex(key, existing)
+        self._devices[key] = device
+        self._index(key, device)
+        return True
+
+    def remove(self, uid):
+        """
+        :param uid: the uid of the device to remove
+        :return: the removed device, None if it was not in the inventory
+        """
+        device = self._devices.pop(uid, None)
+        if device is not None:
+            self._unindex(uid, device)
+        return device
+
+    def update(self, devices, remove_missing=False):
+        """
+        Incrementally merge devices into the inventory, only re-indexing the devices that changed
+        :param devices: iterable of device objects
+        :param remove_missing: drop devices that are in the inventory but not in `devices`, once `devices` has been
+            read to the end. If reading it raises, nothing is removed.
+        :return: dict with the number of devices "added", "changed" and "removed"
+        :rtype: dict
+        """
+        counts = {"added": 0, "changed": 0, "removed": 0}
+        seen = set()
+        for device in devices:
+            key = self.device_key(device)
+            seen.add(key)
+            is_new = key not in self._devices
+            if self.add(device):
+                counts["added" if is_new else "changed"] += 1
+        if remove_missing:
+            for key in [key for key in self._devices if key not in seen]:
+                self.remove(key)
+                counts["removed"] += 1
+        return counts
+
+    def refresh(self):
+        """
+        Reload the devices with the loader the inventory was built with and apply only the differences
+        :return: dict with the number of devices "added", "changed" and "removed"
+        :rtype: dict
+        :raises: HTTPError if the devices cannot all be read, in which case no device is removed
+        """
+        if self.loader is None:
+            raise ValueError("This inventory has no loader to refresh from")
+        counts = self.update(self.loader(), remove_missing=True)
+        logger.debug(f"Inventory refreshed: {counts}")
+        return counts
+
+    def get(self, uid):
+        """
+        :param uid: the device uid
+        :return: the device or None
+        """
+        return self._devices.get(uid)
+
+    def find(self, field, value):
+        """
+        :param field: one of serial, name or ipv4
+        :param value: the value to look up (case insensitive)
+        :return: list of matching devices
+        :rtype: list
+        """
+        return list(self._lookups[field].get(_lookup_key(field, value), {}).values())
+
+    def _first(self, field, value):
+        matches = self._lookups[field].get(_lookup_key(field, value))
+        return next(iter(matches.values())) if matches else None
+
+    def get_by_serial(self, serial):
+        return self._first("serial", serial)
+
+    def get_by_name(self, name):
+        return self._first("name", name)
+
+    def get_by_ipv4(self, ipv4):
+        return self._first("ipv4", ipv4)
+
+    def in_network(self, network):
+        """
+        :param network: a network in CIDR notation e.g. 10.1.0.0/16
+        :return: list of devices whose ipv4 address is in the network
+        :rtype: list
+        """
+        if self._sorted_ipv4 is None:
+            addresses = []
+            for value in self._lookups["ipv4"]:
+                try:
+                    addresses.append((int(ipaddress.IPv4Address(value)), value))
+                except ValueError:
+                    continue
+            addresses.sort()
+            self._sorted_ipv4 = ([address for address, _ in addresses], [value for _, value in addresses])
+        network = ipaddress.IPv4Network(network, strict=False)
+        numbers, values = self._sorted_ipv4
+        low = bisect_left(numbers, int(network.network_address))
+        high = bisect_right(numbers, int(network.broadcast_address))
+        return [device for value in values[low:high] for device in self._lookups["ipv4"][value].values()]
+
+    def group(self, field, value):
+        """
+        :param field: one of deviceType, connectivityState or organizationName
+        :param value: the exact value of the field
+        :return: list of devices in the group
+        :rtype: list
+        """
+        return list(self._groups[field].get(value, {}).values())
+
+    def group_by(self, field):
+        """
+        :param field: one of deviceType, connectivityState or organizationName
+        :return: dict of field value to the list of devices with that value
+        :rtype: dict
+        """
+        return {value: list(members.values()) for value, members in self._groups[field].items()}
+
+    def count_by(self, field):
+        """
+        :param field: one of deviceType, connectivityState or organizationName
+        :return: dict of field value to the number of devices with that value
+        :rtype: dict
+        """
+        return {value: len(members) for value, members in self._groups[field].items()}
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(self._devices.values())
+
+    def __contains__(self, uid):
+        return uid in self._devices
@@ -0,0 +1,346 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PHASES = ("wait", "connect", "server", "transfer", "decode")
+
+# The retry number of the call in flight, set by CDOAPIWrapper so each request knows how many retries preceded it
+request_attempt = ContextVar("cdo_request_attempt", default=0)
+
+_ID_SEGMENTS = (
+    (re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE), "{uid}"),
+    (re.compile(r"^[0-9a-f]{16,}$", re.IGNORECASE), "{uid}"),
+    (re.compile(r"^\d+$"), "{id}"),
+    (re.compile(r"@"), "{user}"),
+)
+_connect_time = threading.local()
+
+
+def endpoint_template(endpoint):
+    """
+    Strip the object identifiers out of a path so that requests for different objects share one metric series, e.g.
+    /aegis/rest/v1/services/targets/devices/0b1c...9f becomes /aegis/rest/v1/services/targets/devices/{uid}
+    :param endpoint: the path of the request
+    :return: the path with uids, numeric ids and user names replaced by placeholders
+    :rtype: str
+    """
+    segments = endpoint.split("?", 1)[0].split("/")
+    for index, segment in enumerate(segments):
+        for pattern, placeholder in _ID_SEGMENTS:
+            if pattern.search(segment):
+                segments[index] = placeholder
+                break
+    return "/".join(segments)
+
+
+def _escape(value):
+    """ Escape a label value for the text exposition format """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def take_connect_time():
+    """
+    :return: the seconds this thread has spent opening (and TLS handshaking) connections since the last call, 0 if the
+        requests in between went out on existing keep-alive connections
+    :rtype: float
+    """
+    seconds = getattr(_connect_time, "seconds", 0.0)
+    _connect_time.seconds = 0.0
+    return seconds
+
+
+class _TimedConnect(object):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_adapter(adapter):
+    """
+    Make the connection pools of a requests HTTPAdapter time how long it takes to open each new connection
+    :param adapter: a requests HTTPAdapter
+    :return: the same adapter
+    """
+    adapter.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+    return adapter
+
+
+class Histogram(object):
+    """ Cumulative histogram with fixed bucket upper bounds, in the style of a Prometheus histogram """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The final bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation within the bucket it falls in, like Prometheus' histogram_quantile
+        :param q: the quantile e.g. 0.99
+        :return: the estimate, None if nothing has been observed
+        :rtype: float or None
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class RequestSample(object):
+    """
+    Timings of a single HTTP request, in seconds. `wait` is the time held back by the rate limiter, `connect` the time
+    spent opening a new connection (0 on a reused keep-alive connection), `server` the time until the response headers
+    arrived and `transfer` the time to read the body. `decode` is filled in by the operations that decode the body.
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "status",
+        "bytes",
+        "retries",
+        "wait",
+        "connect",
+        "server",
+        "transfer",
+        "decode",
+        "started",
+        "error",
+    )
+
+    def __init__(self, method, endpoint, retries=0, started=None):
+        self.method = method
+        self.endpoint = endpoint
+        self.status = None
+        self.bytes = 0
+        self.retries = retries
+        self.wait = 0.0
+        self.connect = 0.0
+        self.server = 0.0
+        self.transfer = 0.0
+        self.decode = 0.0
+        self.started = time.time() if started is None else started
+        self.error = None
+
+    @property
+    def duration(self):
+        """ The total time of the request, from asking the rate limiter to reading (and, once known, decoding) it """
+        return self.wait + self.connect + self.server + self.transfer + self.decode
+
+    def __repr__(self):
+        return (
+            f"RequestSample({self.method} {self.endpoint} status={self.status} bytes={self.bytes} "
+            f"retries={self.retries} duration={self.duration:.4f})"
+        )
+
+
+class RequestMetrics(object):
+    """
+    In-process request metrics. Each finished request is recorded in a latency histogram per method, endpoint template
+    and status, with separate histograms for the time spent in each phase, and then handed to every hook (e.g. to emit a
+    tracing span). A single instance may be shared by many clients, e.g. by all the clients of a CDOFleetExecutor.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, hooks=()):
+        """
+        :param buckets: the upper bounds in seconds of the histogram buckets
+        :param hooks: callables that are called with the RequestSample of every finished request
+        """
+        self.buckets = tuple(buckets)
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        self._latency = {}  # (method, endpoint, status) to Histogram
+        self._phases = {}  # (phase, method, endpoint) to Histogram
+        self._bytes = {}  # (method, endpoint) to total bytes received
+        self._retries = {}  # (method, endpoint) to total retries
+
+    def add_hook(self, hook):
+        """
+        :param hook: callable that is called with the RequestSample of every finished request
+        """
+        self.hooks.append(hook)
+
+    def record(self, sample):
+        """
+        :param sample: a finished request
+        :type sample: RequestSample
+        """
+        status = str(sample.status) if sample.status is not None else "error"
+        with self._lock:
+            key = (sample.method, sample.endpoint, status)
+            if key not in self._latency:
+                self._latency[key] = Histogram(self.buckets)
+            self._latency[key].observe(sample.duration)
+            for phase in PHASES[:-1]:  # The decode time is recorded once the body has been decoded
+                key = (phase, sample.method, sample.endpoint)
+                if key not in self._phases:
+                    self._phases[key] = Histogram(self.buckets)
+                self._phases[key].observe(getattr(sample, phase))
+            key = (sample.method, sample.endpoint)
+            self._bytes[key] = self._bytes.get(key, 0) + sample.bytes
+            # The sample of the n-th retry of a call carries n, so count each retried request once
+            self._retries[key] = self._retries.get(key, 0) + (1 if sample.retries else 0)
+        for hook in self.hooks:
+            try:
+                hook(sample)
+            except Exception as ex:
+                logger.warning(f"Request metrics hook {hook!r} failed: {ex}")
+
+    def record_decode(self, sample, seconds):
+        """
+        Add the time it took to decode the body of an already recorded request
+        :param sample: the RequestSample of the request
+        :param seconds: the decode time
+        """
+        sample.decode += seconds
+        with self._lock:
+            key = ("decode", sample.method, sample.endpoint)
+            if key not in self._phases:
+                self._phases[key] = Histogram(self.buckets)
+            self._phases[key].observe(seconds)
+
+    def quantile(self, endpoint, q, method="GET"):
+        """
+        :param endpoint: the endpoint template
+        :param q: the quantile e.g. 0.5
+        :param method: the HTTP method
+        :return: the estimated latency quantile over all statuses, None if there were no such requests
+        :rtype: float or None
+        """
+        merged = Histogram(self.buckets)
+        with self._lock:
+            for (key_method, key_endpoint, _), histogram in self._latency.items():
+                if key_method == method and key_endpoint == endpoint:
+                    merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+        return merged.quantile(q)
+
+    def summary(self):
+        """
+        :return: dict of "METHOD endpoint" to the request count, mean, p50 and p99 latency in seconds
+        :rtype: dict
+        """
+        with self._lock:
+            endpoints = sorted({(method, endpoint) for method, endpoint, _ in self._latency})
+        summary = {}
+        for method, endpoint in endpoints:
+            with self._lock:
+                histograms = [h for (m, e, _), h in self._latency.items() if (m, e) == (method, endpoint)]
+                count = sum(histogram.count for histogram in histograms)
+                total = sum(histogram.sum for histogram in histograms)
+            summary[f"{method} {endpoint}"] = {
+                "count": count,
+                "mean": total / count if count else None,
+                "p50": self.quantile(endpoint, 0.5, method=method),
+                "p99": self.quantile(endpoint, 0.99, method=method),
+            }
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._latency.clear()
+            self._phases.clear()
+            self._bytes.clear()
+            self._retries.clear()
+
+    @staticmethod
+    def _labels(**labels):
+        escaped = (f'{name}="{_escape(value)}"' for name, value in labels.items())
+        return "{" + ",".join(escaped) + "}"
+
+    def _histogram_lines(self, name, histogram, **labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, histogram.counts):
+            cumulative += count
+            yield f"{name}_bucket{self._labels(**labels, le=f'{bound}')} {cumulative}"
+        yield f"{name}_bucket{self._labels(**labels, le='+Inf')} {histogram.count}"
+        yield f"{name}_sum{self._labels(**labels)} {histogram.sum}"
+        yield f"{name}_count{self._labels(**labels)} {histogram.count}"
+
+    def to_prometheus(self, openmetrics=False):
+        """
+        :param openmetrics: render the OpenMetrics text format instead of the Prometheus text format
+        :return: every metric in the text exposition format, ready to be served on a /metrics endpoint
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            lines.append("# HELP cdo_request_duration_seconds CDO API request latency")
+            lines.append("# TYPE cdo_request_duration_seconds histogram")
+            for (method, endpoint, status), histogram in sorted(self._latency.items()):
+                lines.extend(
+                    self._histogram_lines(
+                        "cdo_request_duration_seconds", histogram, method=method, endpoint=endpoint, status=status
+                    )
+                )
+            lines.append("# HELP cdo_request_phase_seconds CDO API request time by phase")
+            lines.append("# TYPE cdo_request_phase_seconds histogram")
+            for (phase, method, endpoint), histogram in sorted(self._phases.items()):
+                lines.extend(
+                    self._histogram_lines(
+                        "cdo_request_phase_seconds", histogram, phase=phase, method=method, endpoint=endpoint
+                    )
+                )
+            for name, help_text, values in (
+                ("cdo_response_bytes", "CDO API response bytes received", self._bytes),
+                ("cdo_request_retries", "CDO API request retries", self._retries),
+            ):
+                family = name if openmetrics else f"{name}_total"  # OpenMetrics names the family without _total
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} counter")
+                for (method, endpoint), value in sorted(values.items()):
+                    lines.append(f"{name}_total{self._labels(method=method, endpoint=endpoint)} {value}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def to_openmetrics(self):
+        """
+        :return: every metric in the OpenMetrics text format
+        :rtype: str
+        """
+        return self.to_prometheus(openmetrics=True)
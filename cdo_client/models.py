@@ -0,0 +1,217 @@
+import sys
+
+_ABSENT = object()  # A field the API object did not have, as opposed to one it sent as null
+
+
+def _slot_value(record, attribute):
+    try:
+        return object.__getattribute__(record, attribute)
+    except AttributeError:  # Absent fields are left unset
+        return _ABSENT
+
+
+class CDORecord(object):
+    """
+    Compact, __slots__ based record built from an API object. The attributes named in FIELDS are stored in slots, any
+    other keys the API returns are kept in `extra` so that to_dict() gives back the original object. String values of
+    the enum-like INTERNED fields are interned, so e.g. the connectivityState of 50,000 devices shares a handful of
+    string objects. Records also support read access by API key (record["deviceType"], record.get("serial")). A field
+    the API object did not have reads as None as an attribute but is left out of to_dict() and raises KeyError by key,
+    while a field the API sent as null is kept as None.
+    """
+
+    __slots__ = ("extra",)
+    FIELDS = ()  # (attribute name, API key) pairs
+    INTERNED = ()  # API keys whose string values are interned
+    NESTED = {}  # API key to the record class of the objects in that list
+
+    def __init__(self, **kwargs):
+        for attribute, _ in self.FIELDS:
+            value = kwargs.pop(attribute, _ABSENT)
+            if value is not _ABSENT:
+                setattr(self, attribute, value)
+        self.extra = kwargs or None
+
+    def __getattr__(self, name):
+        # Only called for slots that were never set, i.e. fields the API object did not have
+        if name in self._attributes().values():
+            return None
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def __getstate__(self):
+        state = {attribute: _slot_value(self, attribute) for attribute, _ in self.FIELDS}
+        state = {attribute: value for attribute, value in state.items() if value is not _ABSENT}
+        state["extra"] = self.extra
+        return state
+
+    def __setstate__(self, state):
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
+    @classmethod
+    def _attributes(cls):
+        attributes = cls.__dict__.get("_attribute_by_key")
+        if attributes is None:
+            attributes = {key: attribute for attribute, key in cls.FIELDS}
+            cls._attribute_by_key = attributes
+        return attributes
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: the object returned by the API
+        :type data: dict
+        :return: the record
+        """
+        record = cls.__new__(cls)
+        attributes = cls._attributes()
+        extra = None
+        for key, value in data.items():
+            attribute = attributes.get(key)
+            if attribute is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+                continue
+            if key in cls.INTERNED and type(value) is str:
+                value = sys.intern(value)
+            elif key in cls.NESTED and isinstance(value, list):
+                value = [cls.NESTED[key].from_dict(item) if isinstance(item, dict) else item for item in value]
+            setattr(record, attribute, value)
+        record.extra = extra
+        return record
+
+    @classmethod
+    def from_list(cls, data):
+        """
+        :param data: list of objects returned by the API, None is passed through
+        :return: list of records
+        :rtype: list
+        """
+        if data is None:
+            return None
+        return [cls.from_dict(item) for item in data]
+
+    def to_dict(self):
+        """
+        :return: the record as the API object it was built from
+        :rtype: dict
+        """
+        data = {}
+        for attribute, key in self.FIELDS:
+            value = _slot_value(self, attribute)
+            if value is _ABSENT:
+                continue
+            if key in self.NESTED and isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, CDORecord) else item for item in value]
+            data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        attribute = self._attributes().get(key)
+        if attribute is not None:
+            value = _slot_value(self, attribute)
+            if value is not _ABSENT:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        # Records that are equal have the same uid, so records can be kept in sets and used as dict keys. Do not change
+        # the uid of a record while it is in one.
+        return hash((type(self), self.get("uid")))
+
+    def __repr__(self):
+        return f"{type(self).__name__}(uid={getattr(self, 'uid', None)!r}, name={getattr(self, 'name', None)!r})"
+
+
+class Device(CDORecord):
+    FIELDS = (
+        ("uid", "uid"),
+        ("name", "name"),
+        ("device_type", "deviceType"),
+        ("serial", "serial"),
+        ("ipv4", "ipv4"),
+        ("connectivity_state", "connectivityState"),
+        ("config_state", "configState"),
+        ("software_version", "softwareVersion"),
+        ("model_number", "modelNumber"),
+        ("device_role", "deviceRole"),
+        ("organization_name", "organizationName"),
+        ("cdo_region", "cdoRegion"),
+    )
+    INTERNED = (
+        "deviceType",
+        "connectivityState",
+        "configState",
+        "softwareVersion",
+        "modelNumber",
+        "deviceRole",
+        "organizationName",
+        "cdoRegion",
+    )
+    __slots__ = tuple(attribute for attribute, _ in FIELDS)
+
+
+class Tenant(CDORecord):
+    FIELDS = (
+        ("uid", "uid"),
+        ("name", "name"),
+        ("organization_name", "organizationName"),
+        ("services", "services"),
+    )
+    INTERNED = ("organizationName",)
+    __slots__ = tuple(attribute for attribute, _ in FIELDS)
+
+
+class MSSPTenant(CDORecord):
+    FIELDS = (
+        ("uid", "uid"),
+        ("name", "name"),
+        ("organization_name", "organizationName"),
+        ("cdo_region", "cdoRegion"),
+    )
+    INTERNED = ("organizationName", "cdoRegion")
+    __slots__ = tuple(attribute for attribute, _ in FIELDS)
+
+
+class ChangeLogEvent(CDORecord):
+    FIELDS = (
+        ("date", "date"),
+        ("user", "user"),
+        ("action", "action"),
+        ("description", "description"),
+    )
+    INTERNED = ("user", "action")
+    __slots__ = tuple(attribute for attribute, _ in FIELDS)
+
+    def __repr__(self):
+        return f"ChangeLogEvent(date={self.date!r}, action={self.action!r})"
+
+
+class ChangeLog(CDORecord):
+    FIELDS = (
+        ("uid", "uid"),
+        ("name", "name"),
+        ("last_event_timestamp", "lastEventTimestamp"),
+        ("change_log_state", "changeLogState"),
+        ("object_reference", "objectReference"),
+        ("last_event_description", "lastEventDescription"),
+        ("last_event_user", "lastEventUser"),
+        ("events", "events"),
+    )
+    INTERNED = ("changeLogState", "lastEventUser")
+    NESTED = {"events": ChangeLogEvent}
+    __slots__ = tuple(attribute for attribute, _ in FIELDS)
@@ -1,9 +1,15 @@
+from requests import HTTPError
 from .base import CDOBaseClient
-from .helpers import CONNECTIVITY_STATE, CDO_REGION
+from .bulk import BulkReport, iter_concurrent
+from .export import devices_to_dataframe
+from .models import Device, MSSPTenant
+from .transforms import LazyDevice, decode_devices
 import logging
 
 logger = logging.getLogger(__name__)
 
+MSSP_DEVICES_RESOURCE = "devices"
+
 
 class CDOMSSPClient(CDOBaseClient):
     """
@@ -11,8 +17,8 @@ class CDOMSSPClient(CDOBaseClient):
     Note that these operations require a user/token with MSSP Super Admin entitlements
     """
 
-    def __init__(self, mssp_token, region, api_version="", verify=""):
-        super().__init__(mssp_token, region, api_version=api_version, verify=verify)
+    def __init__(self, mssp_token, region, api_version="", verify="", transport=None):
+        super().__init__(mssp_token, region, api_version=api_version, verify=verify, transport=transport)
 
     def add_mssp_tenant(self, tenant_token):
         """
@@ -23,18 +29,126 @@ class CDOMSSPClient(CDOBaseClient):
         """
         return self.post_operation(
             self.PREFIX_LIST["MSSP_TENANTS"],
-            url=f"https://{self.PREFIX_LIST['MSSP_ENV']}",
+            url=self.mssp_url,
             json_data={"apiToken": tenant_token},
         )
 
-    def get_mssp_tenants(self):
+    def add_mssp_tenants(self, tenants, max_workers=8):
+        """
+        Add many tenants to the MSSP portal associated with this mssp token. The portal's tenants are fetched once into
+        a case insensitive index, the name of each tenant given by token alone is read from its tenant context, and
+        tenants that are already there, or repeated in the batch, are skipped without adding them. The remaining adds
+        run concurrently, and a "Duplicate Tenant" response (e.g. the tenant was added by someone else in the
+        meantime, or its name could not be read) is reported as a skip, not a failure.
+        :param tenants: iterable of tenant admin tokens, or of (tenant name, tenant token) pairs
+        :param max_workers: the maximum number of concurrent API calls
+        :return: the report of succeeded, skipped and failed tenants (as given), each paired with the API result, reason
+            or error
+        :rtype: BulkReport
+        :raises: HTTPError if the portal's tenants cannot be read
+        """
+        existing = self.get_operation(
+            self.PREFIX_LIST["MSSP_TENANTS"],
+            url=self.mssp_url,
+            use_cache=False,
+            raise_errors=True,
+        )
+        known_names = set(self.mssp_tenant_index(existing or []))
+        known_tokens = set()
+        report = BulkReport(describe=self._describe_tenant)
+        named = []
+        unnamed = []
+        for tenant in tenants:
+            name, token = tenant if isinstance(tenant, (tuple, list)) else (None, tenant)
+            if token in known_tokens or (name and name.lower() in known_names):
+                report.skip(tenant, "tenant is already in this MSSP portal")
+                continue
+            known_tokens.add(token)
+            if name:
+                known_names.add(name.lower())
+                named.append(tenant)
+            else:
+                unnamed.append(tenant)
+        work = named
+        for tenant, name, error in iter_concurrent(self._tenant_name, unnamed, max_workers=max_workers):
+            if not error and name and name.lower() in known_names:
+                report.skip(tenant, "tenant is already in this MSSP portal")
+                continue
+            if not error and name:
+                known_names.add(name.lower())
+            work.append(tenant)  # If the name cannot be read the API still refuses a duplicate
+        for tenant, result, error in iter_concurrent(self._add_mssp_tenant, work, max_workers=max_workers):
+            if error is None:
+                report.succeed(tenant, result)
+            elif self.is_duplicate_tenant_error(error):
+                report.skip(tenant, "tenant is already in this MSSP portal")
+            else:
+                report.fail(tenant, error)
+        return report
+
+    def _tenant_name(self, token):
+        """
+        :param token: a tenant admin token
+        :return: the name of the tenant the token belongs to, None if it cannot be read
+        """
+        context = self.get_operation(self.PREFIX_LIST["TENANT_CONTEXT"], token=token)
+        if isinstance(context, list):
+            context = context[0] if context else None
+        return context.get("name") if isinstance(context, dict) else None
+
+    def _add_mssp_tenant(self, tenant):
+        token = tenant[1] if isinstance(tenant, (tuple, list)) else tenant
+        return self.post_operation(
+            self.PREFIX_LIST["MSSP_TENANTS"],
+            url=self.mssp_url,
+            json_data={"apiToken": token},
+            raise_errors=True,
+        )
+
+    @staticmethod
+    def _describe_tenant(tenant):
+        """ Name the tenant for the log without giving away its token """
+        if isinstance(tenant, (tuple, list)):
+            return f"tenant {tenant[0]}"
+        return f"tenant with token ...{str(tenant)[-4:]}"
+
+    @staticmethod
+    def is_duplicate_tenant_error(ex):
+        """
+        :param ex: the exception raised by an add_mssp_tenant call
+        :return: True if the API refused the add because the tenant is already in the MSSP portal
+        """
+        if not isinstance(ex, HTTPError) or ex.response is None or ex.response.status_code != 400:
+            return False
+        try:
+            return ex.response.json().get("message") == "Duplicate Tenant"
+        except ValueError:
+            return False
+
+    @staticmethod
+    def mssp_tenant_index(mssp_tenants):
+        """
+        :param mssp_tenants: list of mssp tenant objects
+        :return: dict of the lower case name and organization name of each tenant to the tenant object
+        :rtype: dict
+        """
+        index = {}
+        for tenant in mssp_tenants:
+            for key in ("name", "organizationName"):
+                if tenant.get(key):
+                    index[tenant[key].lower()] = tenant
+        return index
+
+    def get_mssp_tenants(self, as_records=False):
         """
         Get a list of all tenants associated with the mssp portal associated with this mssp token
+        :param as_records: return compact MSSPTenant records instead of dicts
         :return: a list of mssp tenant accounts
         :rtype: list
         """
         # headers = self.build_mssp_headers(mssp_token.strip())
-        return self.get_operation(self.PREFIX_LIST["MSSP_TENANTS"], url=f"https://{self.PREFIX_LIST['MSSP_ENV']}")
+        tenants = self.get_operation(self.PREFIX_LIST["MSSP_TENANTS"], url=self.mssp_url)
+        return MSSPTenant.from_list(tenants) if as_records else tenants
 
     def remove_mssp_tenant(self, tenant_name):
         """
@@ -43,54 +157,121 @@ class CDOMSSPClient(CDOBaseClient):
         :param tenant_name: the name of the tenant to remove from this mssp portal
         :return:
         """
-        return self.delete_operation(
-            f'{self.PREFIX_LIST["MSSP_TENANTS"]}/{tenant_name}', url=f"https://{self.PREFIX_LIST['MSSP_ENV']}"
-        )
+        return self.delete_operation(f'{self.PREFIX_LIST["MSSP_TENANTS"]}/{tenant_name}', url=self.mssp_url)
 
-    def get_mssp_devices(self, device_types=None):
+    def get_mssp_devices(self, device_types=None, lazy=False, as_records=False, query=None):
         """
         Give an MSSP token, return devices in the mssp portal associated with that token for all customers
         :param mssp_token: the token associated with the MSSP portal from which we wish to get device info
         :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
         :type: list
+        :param lazy: return read only LazyDevice views that decode fields on access, see transform_device_details
+        :param as_records: return compact Device records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
         :return: dict of device objects with associated attributes
         :rtype: dict
         """
-        query = None
-        if device_types:
-            query_type = []
-            for device_type in device_types:
-                query_type.append(f'deviceType:"{device_type}"')
-            query = {"q": f"({' OR '.join(query_type)})"}
-
         devices = self.get_operation(
-            self.PREFIX_LIST["MSSP_DEVICES"], url=f"https://{self.PREFIX_LIST['MSSP_ENV']}", params=query
+            self.PREFIX_LIST["MSSP_DEVICES"],
+            url=self.mssp_url,
+            params=self._mssp_device_query(device_types, query),
         )
-        return self.transform_device_details(devices)
+        if as_records:
+            return Device.from_list(self.transform_device_details(devices or []))
+        return self.transform_device_details(devices or [], lazy=lazy)
+
+    def iter_mssp_devices(
+        self,
+        device_types=None,
+        limit=200,
+        max_workers=1,
+        rate_limit=None,
+        lazy=False,
+        as_records=False,
+        query=None,
+        raise_errors=False,
+    ):
+        """
+        Generator that yields the devices in the mssp portal page by page, already transformed to readable values
+        :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
+        :type: list
+        :param limit: the number of devices to request per page
+        :param max_workers: the number of pages to request concurrently
+        :param rate_limit: the maximum number of page requests per second (None to disable)
+        :param lazy: yield read only LazyDevice views that decode fields on access, see transform_device_details
+        :param as_records: yield compact Device records instead of dicts
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :param raise_errors: raise the HTTPError of a page that cannot be read instead of ending the walk there
+        :return: generator of device objects with associated attributes
+        :rtype: generator
+        """
+        for page in self.iter_pages(
+            self.PREFIX_LIST["MSSP_DEVICES"],
+            url=self.mssp_url,
+            params=self._mssp_device_query(device_types, query),
+            limit=limit,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            raise_errors=raise_errors,
+        ):
+            if as_records:
+                yield from map(Device.from_dict, self.transform_device_details(page))
+            else:
+                yield from self.transform_device_details(page, lazy=lazy)
+
+    def get_mssp_devices_dataframe(self, device_types=None, limit=200, query=None):
+        """
+        Return the devices in the mssp portal as a DataFrame. Pages are converted as they arrive and connectivityState
+        and cdoRegion are decoded column-wise rather than device by device (requires pandas)
+        :param device_types: filter on specific device types. [ASA, FTD, AWS, FIREPOWER, MERAKI, UMBRELLA]
+        :type: list
+        :param limit: the number of devices to request per page
+        :param query: a Query of the filters to apply and the fields to return, see cdo_client.query
+        :return: DataFrame with one row per device
+        :rtype: pandas.DataFrame
+        """
+        pages = self.iter_pages(
+            self.PREFIX_LIST["MSSP_DEVICES"],
+            url=self.mssp_url,
+            params=self._mssp_device_query(device_types, query),
+            limit=limit,
+        )
+        return devices_to_dataframe(device for page in pages for device in page)
+
+    @staticmethod
+    def _mssp_device_query(device_types, query=None):
+        """ Build the query that filters mssp devices on the given device types """
+        if query is not None:
+            return query.copy().where("deviceType", *(device_types or ())).params(MSSP_DEVICES_RESOURCE)
+        if not device_types:
+            return None
+        query_type = []
+        for device_type in device_types:
+            query_type.append(f'deviceType:"{device_type}"')
+        return {"q": f"({' OR '.join(query_type)})"}
 
-    def transform_device_details(self, devices):
+    def transform_device_details(self, devices, lazy=False):
         """
-        Transform the data into human readable values
+        Transform the data into human readable values. Codes are decoded column by column, each distinct code is only
+        looked up once and unknown codes are left as they are instead of aborting the whole batch.
         :param devices: device data retrieved from the CDO MSSP API
         :type devices: list
+        :param lazy: instead of decoding the devices in place, wrap each one in a read only LazyDevice view that only
+            decodes a field when it is read
         :return: the device data
         :rtype: list
         """
-        transformed_devices = []
-        for device in devices:
-            device["connectivityState"] = CONNECTIVITY_STATE[device["connectivityState"]]
-            device["cdoRegion"] = CDO_REGION[device["cdoRegion"]]
-            transformed_devices.append(device)
-        return transformed_devices
+        if lazy:
+            return [LazyDevice(device) for device in devices]
+        return decode_devices(devices)
 
     def is_mssp_tenant_exists(self, tenant_org_name):
         """
-        Check
-        :param tenant_org_name: name of tenant we are searching for
+        Check whether a tenant is already in the MSSP portal (case insensitive). To check many tenants, build the index
+        once with mssp_tenant_index(get_mssp_tenants()) instead of calling this for each one.
+        :param tenant_org_name: name of tenant we are searching for, or a tenant object with a "name"
         :return: True if this customer name is already in the MSSP portal, false otherwiser
         """
-        mssp_tenants = self.get_mssp_tenants()
-        if mssp_tenants:
-            for tenant in self.get_mssp_tenants():
-                return True if tenant["organizationName"].lower() == tenant_org_name["name"].lower() else False
-        return False
+        if isinstance(tenant_org_name, dict):
+            tenant_org_name = tenant_org_name["name"]
+        return tenant_org_name.lower() in self.mssp_tenant_index(self.get_mssp_tenants() or [])
@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from .helpers import CONNECTIVITY_STATE, DEVICE_TYPES
+import copy
+
+# Characters with a meaning in the Lucene style query syntax of the `q` parameter
+SPECIAL_CHARACTERS = frozenset('+-&|!(){}[]^"~*?:\\/ ')
+SEARCH_FIELDS = ("name", "ipv4", "serial", "interfaces")
+CONNECTIVITY_CODES = {label: code for code, label in CONNECTIVITY_STATE.items()}
+
+
+def escape(value):
+    """
+    :param value: a value to search for
+    :return: the value with every character that has a meaning in the query syntax backslash escaped
+    :rtype: str
+    """
+    return "".join(f"\\{character}" if character in SPECIAL_CHARACTERS else character for character in str(value))
+
+
+def quote(value):
+    """
+    :param value: a value to search for
+    :return: the value as a quoted phrase
+    :rtype: str
+    """
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def to_epoch_ms(value):
+    """
+    :param value: a datetime (naive datetimes are taken to be UTC) or an epoch timestamp in milliseconds
+    :return: epoch milliseconds, as used by e.g. lastEventTimestamp
+    :rtype: int
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def device_type_code(device_type):
+    """
+    :param device_type: a key of DEVICE_TYPES (e.g. AWS) or a raw deviceType (e.g. AWS_VPC)
+    :return: the deviceType value the API uses
+    :rtype: str
+    """
+    filter_value = DEVICE_TYPES.get(device_type.upper())
+    if filter_value is None:
+        return device_type
+    return filter_value.split(" OR ")[0].replace("deviceType:", "")
+
+
+class Query(object):
+    """
+    Builds the `q` (filter), `resolve` (field projection) and `sort` parameters of a CDO query, escaping every value:
+
+        query = Query().select("uid", "name", "ipv4").device_types("ASA", "FTD").connectivity("ONLINE")
+        client.get_devices(query=query)
+
+    Each filter method adds a clause that must match (clauses are ANDed, the values given to one method are ORed) and
+    returns the query, so calls can be chained.
+    """
+
+    def __init__(self):
+        self.fields = []
+        self.clauses = []
+        self.sort = None
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def select(self, *fields):
+        """ Only return these fields of each object """
+        self.fields.extend(field for field in fields if field not in self.fields)
+        return self
+
+    def where(self, field, *values):
+        """ The field equals one of the values """
+        if values:
+            self.clauses.append(self._any(f"{field}:{quote(value)}" for value in values))
+        return self
+
+    def exclude(self, field, *values):
+        """ The field equals none of the values """
+        for value in values:
+            self.clauses.append(f"NOT {field}:{quote(value)}")
+        return self
+
+    def search(self, text, fields=SEARCH_FIELDS):
+        """ Any of the fields contains the text """
+        if text:
+            self.clauses.append(self._any(f"{field}:*{escape(text)}*" for field in fields))
+        return self
+
+    def device_types(self, *device_types):
+        """ The device is one of the given types, keys of DEVICE_TYPES (e.g. ASA, AWS) or raw deviceType values """
+        codes = [escape(device_type_code(device_type)) for device_type in device_types]
+        if codes:
+            self.clauses.append(self._any(f"(deviceType:{code} OR deviceSubType:{code})" for code in codes))
+        return self
+
+    def connectivity(self, *states):
+        """ The device's connectivityState is one of the given states, labels (e.g. ONLINE) or numeric codes """
+        codes = []
+        for state in states:
+            code = CONNECTIVITY_CODES.get(state.upper(), state) if isinstance(state, str) else state
+            if not isinstance(code, int):
+                raise ValueError(f"Unknown connectivity state {state!r}")
+            codes.append(code)
+        if codes:
+            self.clauses.append(self._any(f"connectivityState:{escape(code)}" for code in codes))
+        return self
+
+    def between(self, field, start=None, end=None):
+        """
+        The timestamp field is within [start, end]
+        :param start: datetime or epoch milliseconds, None for no lower bound
+        :param end: datetime or epoch milliseconds, None for no upper bound
+        """
+        if start is not None or end is not None:
+            lower = "*" if start is None else to_epoch_ms(start)
+            upper = "*" if end is None else to_epoch_ms(end)
+            self.clauses.append(f"{field}:[{lower} TO {upper}]")
+        return self
+
+    def tenant(self, *names):
+        """ The object belongs to one of the given tenants (organizations) """
+        return self.where("organizationName", *names)
+
+    def raw(self, clause):
+        """ Add a clause written by hand, it is used as is """
+        self.clauses.append(f"({clause})")
+        return self
+
+    def order_by(self, field, descending=False):
+        self.sort = f"{field}:{'desc' if descending else 'asc'}"
+        return self
+
+    @staticmethod
+    def _any(terms):
+        terms = list(terms)
+        return f"({' OR '.join(terms)})" if len(terms) > 1 else terms[0]
+
+    @property
+    def q(self):
+        """ The filter, None if there is none """
+        return " AND ".join(self.clauses) or None
+
+    def resolve(self, resource):
+        """
+        :param resource: the path of the queried collection, e.g. targets/devices
+        :return: the resolve parameter, None if no fields were selected
+        """
+        return f"[{resource}.{{{','.join(self.fields)}}}]" if self.fields else None
+
+    def params(self, resource):
+        """
+        :param resource: the path of the queried collection, e.g. targets/devices or changelogs/query
+        :return: the query parameters, only those that are set
+        :rtype: dict
+        """
+        params = {"q": self.q, "resolve": self.resolve(resource), "sort": self.sort}
+        return {key: value for key, value in params.items() if value is not None}
+
+    def __repr__(self):
+        return f"Query(fields={self.fields!r}, q={self.q!r}, sort={self.sort!r})"
@@ -0,0 +1,117 @@
+import threading
+import time
+
+# The shared limiter of a region does not cap the rate until the API throttles a client, it then backs off from this
+# rate and lifts the cap again once it has crept back up to it. set_region_rate_limit() sets a hard cap instead.
+DEFAULT_REGION_RATE = 20
+DEFAULT_REGION_BURST = 20
+
+_region_limiters = {}
+_region_limiters_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """
+    Thread safe token bucket. Callers either block in acquire() or ask reserve() how long they need to wait and sleep on
+    their own (e.g. in an event loop). The rate adapts to the API: on_throttled() backs off after a 429 and
+    on_success() creeps back up towards max_rate, so a shared limiter settles at the highest rate the API accepts. An
+    uncapped limiter only limits the rate between a 429 and the moment it has crept back up to max_rate.
+    """
+
+    def __init__(self, rate, burst=1, max_rate=None, min_rate=0.5, uncapped=False):
+        """
+        :param rate: number of calls per second. None or 0 disables rate limiting
+        :type rate: float
+        :param burst: number of calls that may be made back to back before the rate applies
+        :param max_rate: ceiling for the adaptive rate (defaults to the starting rate)
+        :param min_rate: floor for the adaptive rate
+        :param uncapped: start without a limit, the first 429 starts limiting at half of max_rate (rate is then only
+            used as the default of max_rate)
+        """
+        self.uncapped = uncapped
+        self.max_rate = max_rate or rate
+        self.rate = None if uncapped else rate
+        self.burst = burst
+        self.min_rate = min(min_rate, self.max_rate) if self.max_rate else min_rate
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token from the bucket
+        :return: the number of seconds the caller must wait before making its call
+        :rtype: float
+        """
+        if not self.rate:
+            return max(0.0, self._paused_until - time.monotonic())
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        """ Block until the caller is allowed to make its call """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Hold back every caller of this limiter for the given number of seconds, e.g. when the API sent Retry-After
+        :param seconds: how long to pause for
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_throttled(self):
+        """ The API told us to slow down: halve the rate """
+        if not self.rate and not (self.uncapped and self.max_rate):
+            return
+        with self._lock:
+            if not self.rate:  # Start limiting with an empty bucket rather than a full burst
+                self._tokens = 0.0
+                self._last = time.monotonic()
+            self.rate = max(self.min_rate, (self.rate or self.max_rate) / 2)
+
+    def on_success(self):
+        """ The call went through: additively increase the rate back towards max_rate """
+        if not self.rate or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+            if self.uncapped and self.rate >= self.max_rate:
+                self.rate = None
+
+
+def get_region_limiter(region):
+    """
+    Return the rate limiter shared by every client in this process that talks to the given region. It does not limit
+    the rate until the API throttles one of the clients, see DEFAULT_REGION_RATE.
+    :param region: the CDO region e.g. us, eu, apj
+    :return: the shared limiter for the region
+    :rtype: RateLimiter
+    """
+    with _region_limiters_lock:
+        if region not in _region_limiters:
+            _region_limiters[region] = RateLimiter(DEFAULT_REGION_RATE, burst=DEFAULT_REGION_BURST, uncapped=True)
+        return _region_limiters[region]
+
+
+def set_region_rate_limit(region, rate, burst=1, max_rate=None):
+    """
+    Replace the shared rate limiter of the given region with one that caps the rate of every client of the region
+    :param region: the CDO region e.g. us, eu, apj
+    :param rate: number of calls per second. None or 0 disables rate limiting for the region
+    :param burst: number of calls that may be made back to back before the rate applies
+    :param max_rate: ceiling for the adaptive rate (defaults to rate)
+    :return: the new limiter
+    :rtype: RateLimiter
+    """
+    with _region_limiters_lock:
+        _region_limiters[region] = RateLimiter(rate, burst=burst, max_rate=max_rate)
+        return _region_limiters[region]
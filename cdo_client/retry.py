@@ -0,0 +1,67 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and when a failed API call is retried. Delays grow exponentially with full jitter, and a
+    Retry-After header sent by the API is always honoured as the minimum delay.
+    """
+
+    def __init__(self, max_retries=5, backoff_factor=0.5, max_backoff=60, retry_statuses=RETRY_STATUSES):
+        """
+        :param max_retries: the number of times a call is retried before giving up (0 disables retries)
+        :param backoff_factor: the base delay in seconds, doubled on every attempt
+        :param max_backoff: the longest we will ever wait between two attempts, in seconds
+        :param retry_statuses: the HTTP status codes that are worth retrying
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+    def is_retryable(self, response):
+        """
+        :param response: the response of the failed call, None if the call failed without a response
+        :return: True if the failure is transient and the call may be retried
+        :rtype: bool
+        """
+        return response is None or response.status_code in self.retry_statuses
+
+    def get_retry_delay(self, attempt, response=None):
+        """
+        :param attempt: the number of retries already made for this call
+        :param response: the response of the failed call, None if the call failed without a response (e.g. a
+            connection error)
+        :return: the number of seconds to wait before the next attempt, or None if the call should not be retried
+        :rtype: float or None
+        """
+        if attempt >= self.max_retries or not self.is_retryable(response):
+            return None
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+        if response is not None:
+            retry_after = self.parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value):
+        """
+        :param value: the value of a Retry-After header, either a number of seconds or an HTTP date
+        :return: the number of seconds to wait, or None if the header is missing or invalid
+        :rtype: float or None
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,70 @@
+from contextvars import ContextVar
+import threading
+
+# Set in a caller that was handed the outcome of another caller's call, so that CDOAPIWrapper only lets the rate limiter
+# know about each request once, in the caller that made it
+shared_outcome = ContextVar("cdo_shared_outcome", default=False)
+
+
+class _Call(object):
+    """ A call in progress, the callers that joined it wait on `done` """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical concurrent calls: while a call for a key is in progress, every other thread that asks for the
+    same key waits for that call and gets its result (or its exception) instead of making the call again. Once the call
+    returns the key is forgotten, so results are never served after the fact, which is what ResponseCache is for.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        :param key: identifies the call, e.g. the URL, parameters and token of a GET
+        :param fn: callable that makes the call, only called if no call for the key is in progress
+        :return: the result of the call and whether it was shared from another caller's call
+        :rtype: tuple
+        :raises: whatever the call raised, in every caller that joined it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            shared_outcome.set(True)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    @property
+    def in_flight(self):
+        """ The number of calls in progress """
+        with self._lock:
+            return len(self._calls)
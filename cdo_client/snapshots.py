@@ -0,0 +1,254 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL,
+    created REAL NOT NULL,
+    label TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_tenant ON snapshots (tenant, id);
+CREATE TABLE IF NOT EXISTS snapshot_entries (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    uid TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs (hash),
+    version TEXT,
+    PRIMARY KEY (snapshot_id, uid)
+);
+"""
+
+
+def canonical_json(content):
+    """
+    :param content: a JSON serialisable object
+    :return: the object serialised with sorted keys and no whitespace, so that equal objects give equal bytes
+    :rtype: bytes
+    """
+    return json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+
+
+def content_hash(content):
+    """
+    :param content: a JSON serialisable object
+    :return: the sha256 hex digest of its canonical JSON
+    :rtype: str
+    """
+    return hashlib.sha256(canonical_json(content)).hexdigest()
+
+
+def diff_objects(old, new, path=""):
+    """
+    Structural diff of two JSON documents
+    :param old: the old document
+    :param new: the new document
+    :param path: the path of the documents within their parents, used for the recursion
+    :return: list of (path, old value, new value) tuples, a missing value is None. Paths are slash separated, list
+        items are addressed by index.
+    :rtype: list
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(old.keys() | new.keys(), key=str):
+            changes.extend(diff_objects(old.get(key), new.get(key), f"{path}/{key}"))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        changes = []
+        for index in range(max(len(old), len(new))):
+            changes.extend(
+                diff_objects(
+                    old[index] if index < len(old) else None,
+                    new[index] if index < len(new) else None,
+                    f"{path}/{index}",
+                )
+            )
+        return changes
+    return [(path or "/", old, new)]
+
+
+class SnapshotStore(object):
+    """
+    SQLite backed store of configuration snapshots. Every distinct config is stored once, zlib compressed and keyed by
+    the sha256 of its canonical JSON; a snapshot is only a list of (uid, hash, version) references, so a config that did
+    not change since the previous night costs one row, not another copy.
+    """
+
+    def __init__(self, path, compression_level=6):
+        """
+        :param path: the path of the SQLite database file (":memory:" for a throwaway store)
+        :param compression_level: the zlib compression level of the stored configs
+        """
+        self.path = path
+        self.compression_level = compression_level
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def put(self, content):
+        """
+        Store a config unless an identical one is already stored
+        :param content: the config, any JSON serialisable object
+        :return: the hash the config is stored under
+        :rtype: str
+        """
+        data = canonical_json(content)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO blobs (hash, size, data) VALUES (?, ?, ?)",
+                (digest, len(data), zlib.compress(data, self.compression_level)),
+            )
+        return digest
+
+    def get(self, digest):
+        """
+        :param digest: the hash of a stored config
+        :return: the config
+        :raises: KeyError if there is no such config
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return json.loads(zlib.decompress(row[0]))
+
+    def create_snapshot(self, tenant, entries, label=None):
+        """
+        :param tenant: the tenant name
+        :param entries: mapping of uid to a (hash, version) tuple, the hashes must already have been stored with put
+        :param label: an optional description of the snapshot
+        :return: the id of the new snapshot
+        :rtype: int
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO snapshots (tenant, created, label) VALUES (?, ?, ?)", (tenant, time.time(), label)
+            )
+            snapshot_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO snapshot_entries (snapshot_id, uid, hash, version) VALUES (?, ?, ?, ?)",
+                ((snapshot_id, uid, digest, version) for uid, (digest, version) in entries.items()),
+            )
+        return snapshot_id
+
+    def list_snapshots(self, tenant):
+        """
+        :param tenant: the tenant name
+        :return: list of (id, created, label) tuples of the tenant's snapshots, oldest first
+        :rtype: list
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, created, label FROM snapshots WHERE tenant = ? ORDER BY id", (tenant,)
+            ).fetchall()
+
+    def latest_snapshot(self, tenant):
+        """
+        :param tenant: the tenant name
+        :return: the id of the tenant's newest snapshot, None if there is none
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT MAX(id) FROM snapshots WHERE tenant = ?", (tenant,)).fetchone()
+        return row[0]
+
+    def get_entries(self, snapshot_id):
+        """
+        :param snapshot_id: the id of a snapshot
+        :return: dict of uid to a (hash, version) tuple
+        :rtype: dict
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT uid, hash, version FROM snapshot_entries WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchall()
+        return {uid: (digest, version) for uid, digest, version in rows}
+
+    def load(self, snapshot_id, uid):
+        """
+        :param snapshot_id: the id of a snapshot
+        :param uid: the uid of a config in that snapshot
+        :return: the config as it was when the snapshot was taken
+        :raises: KeyError if the snapshot does not hold that config
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM snapshot_entries WHERE snapshot_id = ? AND uid = ?", (snapshot_id, uid)
+            ).fetchone()
+        if row is None:
+            raise KeyError(uid)
+        return self.get(row[0])
+
+    def diff(self, old_snapshot_id, new_snapshot_id, structural=True):
+        """
+        Compare two snapshots. Configs with the same hash in both are skipped without being read, only configs whose
+        hash changed are decompressed and diffed.
+        :param old_snapshot_id: the id of the older snapshot
+        :param new_snapshot_id: the id of the newer snapshot
+        :param structural: include the structural diff of each changed config
+        :return: dict of "added" and "removed" (lists of uids) and "changed" (dict of uid to the list of (path, old,
+            new) changes, or to None if structural is False)
+        :rtype: dict
+        """
+        old = self.get_entries(old_snapshot_id)
+        new = self.get_entries(new_snapshot_id)
+        changed = {}
+        for uid in sorted(old.keys() & new.keys()):
+            if old[uid][0] != new[uid][0]:
+                changed[uid] = diff_objects(self.get(old[uid][0]), self.get(new[uid][0])) if structural else None
+        return {
+            "added": sorted(new.keys() - old.keys()),
+            "removed": sorted(old.keys() - new.keys()),
+            "changed": changed,
+        }
+
+    def delete_snapshot(self, snapshot_id):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM snapshot_entries WHERE snapshot_id = ?", (snapshot_id,))
+            self._connection.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def prune(self):
+        """
+        Delete the configs that are no longer referenced by any snapshot
+        :return: the number of configs deleted
+        :rtype: int
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM blobs WHERE hash NOT IN (SELECT DISTINCT hash FROM snapshot_entries)"
+            )
+            return cursor.rowcount
+
+    def stats(self):
+        """
+        :return: the number of distinct configs stored, their total size and their total compressed size in bytes
+        :rtype: dict
+        """
+        with self._lock:
+            count, size, stored = self._connection.execute(
+                "SELECT COUNT(*), IFNULL(SUM(size), 0), IFNULL(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {"configs": count, "bytes": size, "stored_bytes": stored}
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
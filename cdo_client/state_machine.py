@@ -1,4 +1,5 @@
 from .base import CDOBaseClient
+from .watcher import JobWatcher
 import logging
 import json
 
@@ -12,8 +13,8 @@ DEBUGGING = "/aegis/rest/v1/services/state-machines/debugging"
 class CDOStateMachines(CDOBaseClient):
     """Class for performing CDO operations"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
 
     def get_state_jobs(self):
         return self.get_operation(self.PREFIX_LIST["JOBS"])
@@ -23,3 +24,13 @@ class CDOStateMachines(CDOBaseClient):
 
     def get_state_debugging(self):
         return self.get_operation(self.PREFIX_LIST["DEBUGGING"])
+
+    def watch_state_machines(self, kind="jobs", on_change=None, **kwargs):
+        """
+        :param kind: the endpoint to watch, one of jobs, instances or debugging
+        :param on_change: callable called with (watcher, events) after every poll that found changes
+        :param kwargs: the polling options of JobWatcher (min_interval, max_interval, backoff, is_active, name)
+        :return: a watcher that reports new, changed, completed and removed jobs, see JobWatcher
+        :rtype: JobWatcher
+        """
+        return JobWatcher(self, kind=kind, on_change=on_change, **kwargs)
@@ -7,8 +7,8 @@ logger = logging.getLogger(__name__)
 class CDOASATargets(CDOBaseClient):
     """Class for performing CDO ASA operations"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
 
     def get_access_groups(self):
         pass
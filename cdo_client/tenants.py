@@ -1,4 +1,7 @@
 from .base import CDOBaseClient
+from .bulk import BulkReport, iter_concurrent
+from .export import tenants_to_dataframe
+from .models import Tenant
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,16 +10,25 @@ logger = logging.getLogger(__name__)
 class CDOTenants(CDOBaseClient):
     """Class for performing CDO tenant operations"""
 
-    def __init__(self, api_token, region, api_version="", verify=""):
-        super().__init__(api_token, region, api_version=api_version, verify=verify)
+    def __init__(self, api_token, region, api_version="", verify="", transport=None):
+        super().__init__(api_token, region, api_version=api_version, verify=verify, transport=transport)
 
-    def get_tenants(self):
+    def get_tenants(self, as_records=False):
         """
         Get a list of all CDO tenants in this region
+        :param as_records: return compact Tenant records instead of dicts
         :return: list of tenants for which this user is entitled
         :rtype: list
         """
-        return self.get_operation(self.PREFIX_LIST["TENANTS"])
+        tenants = self.get_operation(self.PREFIX_LIST["TENANTS"])
+        return Tenant.from_list(tenants) if as_records else tenants
+
+    def get_tenants_dataframe(self):
+        """
+        :return: DataFrame with one row per tenant for which this user is entitled (requires pandas)
+        :rtype: pandas.DataFrame
+        """
+        return tenants_to_dataframe(self.get_tenants() or [])
 
     def search_tenants(self, search_value):
         """
@@ -60,8 +72,9 @@ class CDOTenants(CDOBaseClient):
         :return:
         """
         # html encode the username?
-        data = {"roles": role, "isApiOnlyUser": "true" if is_api_user else "false"}
-        return self.post_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=data)
+        return self.post_operation(
+            f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=self._user_form(role, is_api_user)
+        )
 
     def generate_tenant_user_api_token(self, username):
         """
@@ -89,5 +102,61 @@ class CDOTenants(CDOBaseClient):
         """
         # POST /anubis/rest/v1/users/aaron_309%40yahoo.com
         # request form data roles=ROLE_ADMIN&isApiOnlyUser=false
-        data = {"roles": role, "isApiOnlyUser": "true" if is_api_user else "false"}
-        return self.post_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=data)
+        return self.post_operation(
+            f"{self.PREFIX_LIST['TENANT_USERS']}/{username}", data=self._user_form(role, is_api_user)
+        )
+
+    @staticmethod
+    def _user_form(role, is_api_user):
+        return {"roles": role, "isApiOnlyUser": "true" if is_api_user else "false"}
+
+    def provision_tenant_users(self, users, max_workers=8):
+        """
+        Add, update or delete many users, or generate their API tokens, concurrently. The existing users are read once
+        up front: adds of users that already exist and updates, deletes and token requests for users that do not exist
+        are skipped without calling the API. Calls share the client's rate limiter and errors are reported per user.
+        :param users: iterable of user specs, dicts of "username", "role", "is_api_user" (default False) and "action",
+            one of add (the default), update, delete or token
+        :param max_workers: the maximum number of concurrent API calls
+        :return: the report of succeeded, skipped and failed specs, each paired with the API result, reason or error
+        :rtype: BulkReport
+        :raises: HTTPError if the existing users cannot be read
+        """
+        existing = self.get_operation(self.PREFIX_LIST["TENANT_USERS"], use_cache=False, raise_errors=True) or []
+        existing = {user["name"].lower(): user for user in existing if user.get("name")}
+        report = BulkReport()
+        work = []
+        for spec in users:
+            username = spec.get("username") if isinstance(spec, dict) else None
+            if not isinstance(username, str) or not username:
+                report.fail(spec, ValueError("The spec has no username"))
+                continue
+            action = spec.get("action", "add")
+            user = existing.get(username.lower())
+            if action not in ("add", "update", "delete", "token"):
+                report.fail(spec, ValueError(f"Unknown action {action!r}"))
+            elif action == "add" and user:
+                report.skip(spec, "user already exists")
+            elif action != "add" and not user:
+                report.skip(spec, "user does not exist")
+            else:
+                work.append((spec, user))
+        for (spec, _), result, error in iter_concurrent(self._provision_tenant_user, work, max_workers=max_workers):
+            if error:
+                report.fail(spec, error)
+            else:
+                report.succeed(spec, result)
+        return report
+
+    def _provision_tenant_user(self, work_item):
+        spec, user = work_item
+        action = spec.get("action", "add")
+        if action == "delete":
+            return self.delete_operation(f"{self.PREFIX_LIST['TENANT_USERS']}/{user['uid']}", raise_errors=True)
+        if action == "token":
+            return self.post_operation(f"{self.PREFIX_LIST['TENANT_TOKEN']}/{spec['username']}", raise_errors=True)
+        return self.post_operation(
+            f"{self.PREFIX_LIST['TENANT_USERS']}/{spec['username']}",
+            data=self._user_form(spec["role"], spec.get("is_api_user", False)),
+            raise_errors=True,
+        )
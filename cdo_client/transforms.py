@@ -0,0 +1,93 @@
+from collections.abc import Mapping
+from .helpers import CONNECTIVITY_STATE, CDO_REGION
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEVICE_DECODERS = {"connectivityState": CONNECTIVITY_STATE, "cdoRegion": CDO_REGION}
+
+
+def decode_value(value, mapping):
+    """
+    :param value: a code as returned by the API
+    :param mapping: dict of code to label
+    :return: the label of the code, or the value itself if it is not a known code (e.g. it is already a label)
+    """
+    try:
+        return mapping.get(value, value)
+    except TypeError:  # Unhashable values can never be codes
+        return value
+
+
+def decode_values(values, mapping):
+    """
+    Decode a whole column of codes. Each distinct code is looked up once, unknown codes are passed through unchanged and
+    reported once per call instead of aborting the whole batch.
+    :param values: list of codes
+    :param mapping: dict of code to label
+    :return: list of labels
+    :rtype: list
+    """
+    labels = {}
+    for value in values:
+        try:
+            if value in labels:
+                continue
+        except TypeError:  # Unhashable values can never be codes, decode_value() passes them through
+            continue
+        if value in mapping:
+            labels[value] = mapping[value]
+        else:
+            labels[value] = value
+            if value is not None and value not in mapping.values():
+                logger.warning(f"Unknown code {value!r}, leaving it undecoded")
+    return [decode_value(value, labels) for value in values]
+
+
+def decode_devices(devices, decoders=None):
+    """
+    Decode the coded fields of a batch of devices column by column, writing the labels back into the same dicts
+    :param devices: list of device objects
+    :param decoders: dict of field name to a code to label mapping (defaults to DEVICE_DECODERS)
+    :return: the same list
+    :rtype: list
+    """
+    for field, mapping in (decoders or DEVICE_DECODERS).items():
+        column = [device.get(field) for device in devices]
+        for device, label in zip(devices, decode_values(column, mapping)):
+            if field in device:
+                device[field] = label
+    return devices
+
+
+class LazyDevice(Mapping):
+    """
+    Read only view of a raw device object that decodes connectivityState and cdoRegion only when they are read. The raw
+    dict is neither copied nor modified and remains available as `raw`.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __getitem__(self, key):
+        value = self.raw[key]
+        mapping = DEVICE_DECODERS.get(key)
+        return value if mapping is None else decode_value(value, mapping)
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __repr__(self):
+        return f"LazyDevice({self.raw!r})"
+
+    def to_dict(self):
+        """
+        :return: a decoded copy of the device as a plain dict
+        :rtype: dict
+        """
+        return {key: self[key] for key in self.raw}
@@ -0,0 +1,121 @@
+from requests import session
+from requests.adapters import HTTPAdapter
+from .metrics import instrument_adapter
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_region_transports = {}
+_region_transports_lock = threading.Lock()
+
+
+class CDOTransport(object):
+    """
+    Holds the connection pools used by CDO clients. Any number of clients (e.g. one per tenant, or one per thread) can
+    share a transport: each client keeps its own requests session and headers, but all of the sessions are mounted on
+    the same HTTP adapters, so keep-alive connections to each CDO host are pooled and reused across all of them.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, host_pool_sizes=None, pool_block=False):
+        """
+        :param pool_connections: the number of distinct hosts for which a connection pool is kept
+        :param pool_maxsize: the number of keep-alive connections kept per host
+        :param host_pool_sizes: mapping of host name to the number of keep-alive connections kept for that host, e.g.
+            {"edge.us.cdo.cisco.com": 50}
+        :type host_pool_sizes: dict
+        :param pool_block: block when all connections to a host are in use, instead of opening a throwaway connection
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.adapter = instrument_adapter(
+            HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        )
+        self.host_adapters = {}
+        for host, pool_size in (host_pool_sizes or {}).items():
+            self.set_host_pool_size(host, pool_size)
+
+    def set_host_pool_size(self, host, pool_size):
+        """
+        Give the host its own connection pool of the given size. Sessions created after this call pick it up.
+        :param host: the host name e.g. edge.us.cdo.cisco.com
+        :param pool_size: the number of keep-alive connections kept for that host
+        """
+        self.host_adapters[host.lower()] = instrument_adapter(
+            HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=self.pool_block)
+        )
+
+    def mount(self, http_session):
+        """
+        Mount the shared adapters on the given session
+        :param http_session: a requests session
+        :return: the same session
+        """
+        http_session.mount("https://", self.adapter)
+        http_session.mount("http://", self.adapter)
+        for host, adapter in self.host_adapters.items():
+            http_session.mount(f"https://{host}/", adapter)
+        return http_session
+
+    def create_session(self):
+        """
+        :return: a new requests session that draws its connections from this transport
+        :rtype: requests.Session
+        """
+        return self.mount(session())
+
+    def pool_stats(self):
+        """
+        Return the connection reuse metrics of every live connection pool. A hit is a request that went out on an
+        existing keep-alive connection, a miss is a request that had to open (and TLS handshake) a new connection.
+        :return: dict keyed by host of {"requests", "connections", "hits", "misses"}
+        :rtype: dict
+        """
+        stats = {}
+        for adapter in [self.adapter, *self.host_adapters.values()]:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host_stats = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "hits": 0, "misses": 0})
+                host_stats["requests"] += pool.num_requests
+                host_stats["connections"] += pool.num_connections
+                host_stats["misses"] += pool.num_connections
+                host_stats["hits"] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+    def close(self):
+        """ Close every pooled connection """
+        self.adapter.close()
+        for adapter in self.host_adapters.values():
+            adapter.close()
+
+
+def get_region_transport(region):
+    """
+    Return the transport shared by every client in this process that talks to the given region and was not given a
+    transport of its own, so that clients for different tenants (tokens) reuse each other's keep-alive connections
+    :param region: the CDO region e.g. us, eu, apj
+    :return: the shared transport for the region
+    :rtype: CDOTransport
+    """
+    with _region_transports_lock:
+        if region not in _region_transports:
+            _region_transports[region] = CDOTransport()
+        return _region_transports[region]
+
+
+def set_region_transport(region, transport):
+    """
+    Replace the shared transport of the given region, e.g. with one whose pools are sized for many concurrent clients
+    :param region: the CDO region e.g. us, eu, apj
+    :param transport: the new transport
+    :type transport: CDOTransport
+    :return: the new transport
+    :rtype: CDOTransport
+    """
+    with _region_transports_lock:
+        _region_transports[region] = transport
+        return transport
@@ -0,0 +1,283 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WATCHED_ENDPOINTS = {"jobs": "JOBS", "instances": "INSTANCES", "debugging": "DEBUGGING"}
+STATUS_KEYS = ("jobStatus", "status", "state", "currentState")
+TERMINAL_STATES = frozenset(
+    ("DONE", "DONE_WITH_ERROR", "COMPLETED", "FINISHED", "SUCCESS", "SUCCEEDED", "FAILED", "ERROR", "CANCELLED")
+)
+
+
+def is_job_active(job):
+    """
+    The default test of whether a state machine job is still running: it is active unless its status says it is done
+    :param job: a job, instance or debugging object
+    :return: True if the job has not reached a terminal state
+    """
+    for key in STATUS_KEYS:
+        status = job.get(key)
+        if isinstance(status, str):
+            return status.upper() not in TERMINAL_STATES
+    return not job.get("completed", False)
+
+
+def fingerprint(job):
+    """
+    :return: a digest of the job's content, equal for equal jobs whatever the order of their keys
+    :rtype: bytes
+    """
+    return hashlib.blake2b(json.dumps(job, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+
+class JobEvent(object):
+    """ A change between two snapshots: `kind` is one of new, changed, completed or removed """
+
+    __slots__ = ("kind", "uid", "job")
+
+    def __init__(self, kind, uid, job):
+        self.kind = kind
+        self.uid = uid
+        self.job = job
+
+    def __repr__(self):
+        return f"JobEvent({self.kind!r}, uid={self.uid!r})"
+
+
+class SnapshotDiff(object):
+    """
+    Diffs successive snapshots of a state machine endpoint by uid. Only the uid, a content fingerprint and whether each
+    job is active are kept between polls, never the previous snapshot itself.
+    """
+
+    def __init__(self, is_active=is_job_active):
+        self.is_active = is_active
+        self.index = {}  # uid to (fingerprint, active)
+        self.primed = False
+
+    @property
+    def active(self):
+        """ The number of jobs that were active in the last snapshot """
+        return sum(1 for _, active in self.index.values() if active)
+
+    def diff(self, snapshot):
+        """
+        :param snapshot: list of job objects
+        :return: the events since the previous snapshot. The first snapshot reports every job that is still active as
+            new, finished jobs that were already there before the watch started are not reported.
+        :rtype: list
+        """
+        events = []
+        index = {}
+        for job in snapshot or []:
+            uid = job.get("uid")
+            if uid is None:
+                continue
+            digest = fingerprint(job)
+            active = self.is_active(job)
+            index[uid] = (digest, active)
+            previous = self.index.get(uid)
+            if previous is None:
+                if active or self.primed:
+                    events.append(JobEvent("new" if active else "completed", uid, job))
+            elif previous[0] != digest:
+                events.append(JobEvent("completed" if previous[1] and not active else "changed", uid, job))
+        for uid in self.index.keys() - index.keys():
+            events.append(JobEvent("removed", uid, None))
+        self.index = index
+        self.primed = True
+        return events
+
+
+class JobWatcher(object):
+    """
+    Polls one of the state machine endpoints of a client and reports what changed. The poll interval adapts: it drops
+    to `min_interval` while jobs are active or changing and backs off exponentially towards `max_interval` while idle.
+    """
+
+    def __init__(
+        self,
+        client,
+        kind="jobs",
+        on_change=None,
+        min_interval=1.0,
+        max_interval=60.0,
+        backoff=2.0,
+        is_active=is_job_active,
+        name=None,
+    ):
+        """
+        :param client: the client whose state machines are watched
+        :param kind: the endpoint to watch, one of jobs, instances or debugging
+        :param on_change: callable called with (watcher, events) after every poll that found changes
+        :param min_interval: the poll interval in seconds while there is activity
+        :param max_interval: the longest poll interval in seconds while idle
+        :param backoff: the factor the interval grows by after each idle poll
+        :param is_active: callable that tells whether a job is still running
+        :param name: a label for the watcher e.g. the tenant name, defaults to the kind
+        """
+        if kind not in WATCHED_ENDPOINTS:
+            raise ValueError(f"kind must be one of {', '.join(WATCHED_ENDPOINTS)}")
+        self.client = client
+        self.kind = kind
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.name = name or kind
+        self.interval = min_interval
+        self.differ = SnapshotDiff(is_active=is_active)
+
+    @property
+    def endpoint(self):
+        return self.client.PREFIX_LIST[WATCHED_ENDPOINTS[self.kind]]
+
+    def fetch(self):
+        """
+        :return: the current snapshot, always fresh from the API
+        :rtype: list
+        :raises: HTTPError if the snapshot cannot be read, so that a failed poll never looks like every job vanished
+        """
+        return self.client.get_operation(self.endpoint, use_cache=False, raise_errors=True)
+
+    def update(self, snapshot):
+        """
+        Diff a snapshot against the previous one, adapt the poll interval and notify on_change
+        :param snapshot: list of job objects
+        :return: the events
+        :rtype: list
+        """
+        events = self.differ.diff(snapshot)
+        if events or self.differ.active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        if events and self.on_change:
+            self.on_change(self, events)
+        return events
+
+    def on_error(self, ex):
+        """ Back off after a failed poll, the next successful one resets the interval """
+        logger.error(f"Polling {self.name} failed: {ex}")
+        self.interval = min(max(self.interval, self.min_interval) * self.backoff, self.max_interval)
+
+    def poll(self):
+        """
+        :return: the events since the previous poll
+        :rtype: list
+        """
+        return self.update(self.fetch())
+
+    def __iter__(self):
+        """ Poll forever, yielding each event as it is found """
+        while True:
+            yield from self.poll()
+            time.sleep(self.interval)
+
+    def wait(self, timeout=None):
+        """
+        Poll until no job is active, e.g. to wait for a deploy to finish
+        :param timeout: give up after this many seconds
+        :return: True if every job finished, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.poll()
+            if not self.differ.active:
+                return True
+            if deadline is not None and time.monotonic() + self.interval > deadline:
+                return False
+            time.sleep(self.interval)
+
+
+class WatchScheduler(object):
+    """
+    Runs any number of watchers, e.g. one per tenant, from a single scheduling thread and a small pool of pollers. Each
+    watcher is polled when its own adaptive interval is due, so idle tenants cost next to nothing.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._queue = []  # heap of (due, sequence, watcher)
+        self._sequence = itertools.count()
+        self._polling = set()
+        self._watchers = set()
+        self._condition = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+    def add(self, watcher, delay=0.0):
+        """
+        :param watcher: the JobWatcher to run
+        :param delay: seconds until its first poll
+        :return: the watcher
+        """
+        with self._condition:
+            self._watchers.add(watcher)
+            self._schedule(watcher, delay)
+        return watcher
+
+    def remove(self, watcher):
+        with self._condition:
+            self._watchers.discard(watcher)
+
+    def _schedule(self, watcher, delay):
+        heapq.heappush(self._queue, (time.monotonic() + delay, next(self._sequence), watcher))
+        self._condition.notify()
+
+    def _poll(self, watcher):
+        try:
+            watcher.poll()
+        except Exception as ex:
+            watcher.on_error(ex)
+        with self._condition:
+            self._polling.discard(watcher)
+            if watcher in self._watchers and not self._stopped:
+                self._schedule(watcher, watcher.interval)
+
+    def _run(self):
+        with self._condition:
+            while not self._stopped:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                due, _, watcher = self._queue[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._queue)
+                if watcher in self._watchers and watcher not in self._polling:
+                    self._polling.add(watcher)
+                    self._executor.submit(self._poll, watcher)
+
+    def start(self):
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run, name="cdo-watch-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stop scheduling polls and wait for the polls in progress to finish """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,4 +1,4 @@
-from cdo_client import CDOMSSPClient
+from cdo_client import CDOMSSPClient, Query
 import os
 import sys
 
@@ -6,6 +6,7 @@ import sys
 This is an example of how one might use the CDO client to access the MSSP portal and gather data on all devices
 Requires:   An MSSP Token - This is an API toekn from the MSSP Portal Space in CDO
             A CDO token - this is what allows us to access a list of all tenants that this token/user has access to
+            pandas
 """
 
 
@@ -26,9 +27,9 @@ def print_all_devices(mssp_client):
         "connectivityState",
         "deviceRole",
     ]
-    print(",".join(fields))
-    for device in mssp_client.get_mssp_devices():
-        print(",".join([str(device.get(field)) for field in fields]))
+    # Only ask the API for the columns we print
+    devices = mssp_client.get_mssp_devices_dataframe(query=Query().select(*fields))
+    devices.reindex(columns=fields).to_csv(sys.stdout, index=False)
 
 
 if __name__ == "__main__":
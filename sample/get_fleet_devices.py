@@ -0,0 +1,29 @@
+from cdo_client import CDOFleetExecutor
+import json
+import os
+
+"""
+This is an example of how one might run the same query across many tenants in several regions at once
+Requires:   A json file that maps each tenant name to a [token, region] pair, e.g.
+            {"tenant-a": ["eyJhbGciOi...", "us"], "tenant-b": ["eyJhbGciOi...", "eu"]}
+"""
+
+
+def main(fleet_file):
+    with open(fleet_file) as f:
+        tenants = {name: tuple(token_region) for name, token_region in json.load(f).items()}
+    fleet = CDOFleetExecutor(tenants, max_workers=8, region_limits={"apj": 4})
+    print_device_counts(fleet)
+
+
+def print_device_counts(fleet):
+    print("tenant,devices")
+    for tenant, devices in fleet.run("get_devices"):
+        if isinstance(devices, Exception):
+            print(f"{tenant},ERROR {devices}")
+        else:
+            print(f"{tenant},{len(devices or [])}")
+
+
+if __name__ == "__main__":
+    main(os.environ["CDO_FLEET_FILE"])
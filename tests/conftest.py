@@ -0,0 +1,23 @@
+import pytest
+from benchmarks.mock_server import MockCDOServer, MockConfig
+from cdo_client import CDOClient
+from cdo_client.ratelimit import RateLimiter
+
+RECORDS = 450  # Not a multiple of the page sizes used by the tests, so the last page is a short one
+
+
+@pytest.fixture
+def server():
+    config = MockConfig(tenants=5, devices=RECORDS, changelogs=RECORDS, users=5, events_per_changelog=1)
+    with MockCDOServer(config) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = CDOClient("test-token", "us")
+    client.base_url = client.mssp_url = server.url
+    # A limiter of its own, so the 429s of one test never slow down the region's shared limiter for the next one
+    client.rate_limiter = RateLimiter(100, burst=100, uncapped=True)
+    client.retry_policy.backoff_factor = 0.01
+    return client
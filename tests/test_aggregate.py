@@ -0,0 +1,38 @@
+from benchmarks.mock_server import MOCK_NOW
+from cdo_client import ChangelogAggregator, CDOFleetExecutor, Query
+from cdo_client.changelogs import changelog_params
+from .conftest import RECORDS
+
+START = MOCK_NOW - RECORDS * 60_000 + 1  # The timestamp of the oldest changelog served by the mock API
+END = MOCK_NOW + 1
+
+
+def test_fleet_changelogs_are_merged_in_time_order(client):
+    clients = {tenant: client.with_token(tenant) for tenant in ("a", "b", "c")}
+    aggregator = ChangelogAggregator(clients, window=3_600_000, max_workers=4, limit=50)
+    changelogs = list(aggregator.iter_changelogs(START, END))
+    timestamps = [changelog["lastEventTimestamp"] for _, changelog in changelogs]
+    assert len(changelogs) == 3 * RECORDS
+    assert timestamps == sorted(timestamps)
+    assert {tenant for tenant, _ in changelogs} == {"a", "b", "c"}
+
+
+def test_failed_shards_are_reported(client, server):
+    client.retry_policy.max_retries = 0
+    server.fail_next(503, count=1)
+    aggregator = ChangelogAggregator({"a": client}, window=3_600_000 * 24)
+    report = aggregator.aggregate(lambda tenant, changelog: None, START, END)
+    assert report.summary == {"succeeded": 0, "skipped": 0, "failed": 1}
+
+
+def test_the_merge_key_is_always_selected(client):
+    aggregator = ChangelogAggregator({"a": client}, query=Query().select("uid", "name"))
+    assert changelog_params("lastEventTimestamp:asc", aggregator.query)["resolve"] == (
+        "[changelogs/query.{uid,name,lastEventTimestamp}]"
+    )
+
+
+def test_fleet_region_limits_are_honoured():
+    fleet = CDOFleetExecutor({"a": ("token-a", "us"), "b": ("token-b", "eu")}, max_workers=8, region_limits={"eu": 2})
+    aggregator = ChangelogAggregator(fleet, max_workers=4)
+    assert aggregator._region_limits == {"us": 4, "eu": 2}
@@ -0,0 +1,46 @@
+import pytest
+from requests import HTTPError
+from benchmarks.mock_server import MOCK_NOW
+from cdo_client import ChangelogStore
+from .conftest import RECORDS
+
+
+@pytest.fixture
+def store():
+    store = ChangelogStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_first_sync_stores_everything(client, server, store):
+    assert client.sync_changelogs(store, "tenant", limit=100) == RECORDS
+    assert store.get_high_water_mark("tenant") == (MOCK_NOW, server.fleet.changelogs[0]["uid"])
+    assert len(list(store.iter_changelogs("tenant"))) == RECORDS
+
+
+def test_resync_only_fetches_what_changed(client, server, store):
+    client.sync_changelogs(store, "tenant", limit=100)
+    newest = dict(server.fleet.changelogs[0], uid="new", lastEventTimestamp=MOCK_NOW + 60_000)
+    server.fleet.changelogs.insert(0, newest)
+    requests = server.requests
+    assert client.sync_changelogs(store, "tenant", limit=100) == 1
+    assert server.requests - requests == 1  # The first page already reaches the previous high water mark
+    assert store.get_high_water_mark("tenant") == (MOCK_NOW + 60_000, "new")
+
+
+def test_failed_page_keeps_the_high_water_mark(client, server, store):
+    server.fail_next(401, path="offset=200")
+    with pytest.raises(HTTPError):
+        client.sync_changelogs(store, "tenant", limit=100)
+    assert store.get_high_water_mark("tenant") == (None, None)
+    assert client.sync_changelogs(store, "tenant", limit=100) == RECORDS - 200
+    assert len(list(store.iter_changelogs("tenant"))) == RECORDS
+
+
+def test_exhausted_retries_keep_the_high_water_mark(client, server, store):
+    client.retry_policy.max_retries = 1
+    server.fail_next(503, count=2, path="offset=300")
+    with pytest.raises(HTTPError):
+        client.sync_changelogs(store, "tenant", limit=100)
+    assert store.get_high_water_mark("tenant") == (None, None)
+    assert client.sync_changelogs(store, "tenant", limit=100) == RECORDS - 300
@@ -0,0 +1,46 @@
+import json
+import pytest
+from cdo_client.decoders import decode_json, iter_json_array
+
+DOCUMENT = [{"uid": "a", "name": "fw-1", "tags": [1, 2.5, None, True]}, "xé", 10, [], {}, -3e-2]
+
+
+def test_raw_body_decodes_to_the_same_document(client):
+    endpoint = client.PREFIX_LIST["DEVICES"]
+    raw = client.get_operation(endpoint, params={"limit": "50", "offset": "0"}, raw=True)
+    assert isinstance(raw, bytes)
+    assert decode_json(raw) == json.loads(raw) == client.get_operation(endpoint, params={"limit": "50", "offset": "0"})
+
+
+def test_streaming_matches_the_buffered_response(client, server):
+    endpoint = client.PREFIX_LIST["CHANGELOG_QUERY"]
+    streamed = list(client.iter_operation(endpoint, chunk_size=1024))
+    assert streamed == client.get_operation(endpoint) == server.fleet.changelogs
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_iter_json_array_across_chunk_boundaries(size):
+    body = json.dumps(DOCUMENT).encode()
+    chunks = [body[start : start + size] for start in range(0, len(body), size)]  # noqa: E203
+    assert list(iter_json_array(chunks)) == DOCUMENT
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"", b"[1 2]", b"[1,,2]", b"[,1]", b"[1,]", b"[1", b"[1]garbage", b"[1] [2]", b'["unterminated]'],
+)
+def test_iter_json_array_rejects_what_json_loads_rejects(body):
+    with pytest.raises(ValueError):
+        json.loads(body or b" ")
+    with pytest.raises(ValueError):
+        list(iter_json_array([body]))
+
+
+def test_iter_json_array_rejects_other_documents():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"uid": "a"}']))
+
+
+@pytest.mark.parametrize("body", [b"[]", b" [ ] ", b"[1]\n", b'[{"a": [1, {"b": "]"}]}, "[,]"]'])
+def test_iter_json_array_accepts_what_json_loads_accepts(body):
+    assert list(iter_json_array([body])) == json.loads(body)
@@ -0,0 +1,38 @@
+import pytest
+from requests import HTTPError
+from .conftest import RECORDS
+
+
+def test_iter_records_walks_every_page(client, server):
+    records = list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=100))
+    assert [record["uid"] for record in records] == [changelog["uid"] for changelog in server.fleet.changelogs]
+    assert server.requests == 5  # Four full pages and the short one that ends the walk
+
+
+def test_iter_records_stops_at_an_empty_page(client, server):
+    records = list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=150))
+    assert len(records) == RECORDS
+    assert server.requests == 4  # The last full page may not be the last one, only the empty page after it proves it
+
+
+def test_concurrent_pages_are_yielded_in_offset_order(client, server):
+    sequential = list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=50))
+    concurrent = list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=50, max_workers=4))
+    assert concurrent == sequential
+
+
+def test_failed_page_ends_the_walk(client, server):
+    server.fail_next(401, path="offset=200")
+    records = list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=100))
+    assert len(records) == 200
+
+
+def test_failed_page_raises_with_raise_errors(client, server):
+    server.fail_next(401, path="offset=200")
+    with pytest.raises(HTTPError):
+        list(client.iter_records(client.PREFIX_LIST["CHANGELOG_QUERY"], limit=100, raise_errors=True))
+
+
+def test_iter_devices(client, server):
+    devices = list(client.iter_devices(limit=200, as_records=True))
+    assert [device.uid for device in devices] == [device["uid"] for device in server.fleet.devices]
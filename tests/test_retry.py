@@ -0,0 +1,53 @@
+import pytest
+import time
+from requests import HTTPError
+
+
+def test_503_is_retried(client, server):
+    server.fail_next(503, count=2)
+    assert len(client.get_tenants()) == len(server.fleet.tenants)
+    assert server.requests == 3
+
+
+def test_429_honours_retry_after_and_slows_the_limiter(client, server):
+    server.fail_next(429, retry_after=1)
+    start = time.monotonic()
+    assert len(client.get_tenants()) == len(server.fleet.tenants)
+    assert time.monotonic() - start >= 0.9
+    assert server.requests == 2
+    assert client.rate_limiter.rate == 51  # Half of max_rate after the 429, then one success creeps it back up
+
+
+def test_gives_up_after_max_retries(client, server):
+    client.retry_policy.max_retries = 2
+    server.fail_next(503, count=10)
+    assert client.get_tenants() is None
+    assert server.requests == 3
+
+
+def test_gives_up_after_max_retries_with_raise_errors(client, server):
+    client.retry_policy.max_retries = 2
+    server.fail_next(503, count=10)
+    with pytest.raises(HTTPError) as error:
+        client.get_operation(client.PREFIX_LIST["TENANTS"], raise_errors=True)
+    assert error.value.response.status_code == 503
+
+
+def test_client_errors_are_not_retried(client, server):
+    server.fail_next(404)
+    assert client.get_tenants() is None
+    assert server.requests == 1
+
+
+def test_post_is_not_resent_after_a_503(client, server):
+    server.fail_next(503)
+    assert client.add_tenant_user("new@example.com", "ROLE_ADMIN") is None
+    assert server.requests == 1
+    assert "new@example.com" not in server.fleet.users
+
+
+def test_post_is_resent_after_a_429(client, server):
+    server.fail_next(429)
+    user = client.add_tenant_user("new@example.com", "ROLE_ADMIN")
+    assert user["name"] == "new@example.com"
+    assert server.requests == 2